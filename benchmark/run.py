@@ -0,0 +1,130 @@
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import resource
+import threading
+
+from benchmark.site import LocalSite, SiteConfig
+from src.async_scraper import AsyncDoctorScraper
+from src.rate_limit import RateLimiter
+from src.scraper import DEPTHS, DoctorScraper
+from utils.setup_logger import logger
+from utils.html_parser import available_parsers
+
+
+class TimedParser:
+    """Envolve o backend de parsing do scraper, medindo o tempo gasto em cada página."""
+
+    def __init__(self, parser):
+        self.parser = parser
+        self.name = parser.name
+        self.pages = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def parse(self, html: str):
+        start = time.perf_counter()
+        try:
+            return self.parser.parse(html)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.seconds += elapsed
+                self.pages += 1
+
+
+def peak_rss_mb() -> float:
+    """Pico de memória residente do processo, em MB (`ru_maxrss` vem em KB no Linux e em bytes no macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def run_benchmark(site: LocalSite, assincrono: bool = False, concorrencia: int = 10, parser: str = None,
+                  taxa: float = 1000.0, profundidade: str = "qa") -> dict:
+    """Raspa o site local uma vez e retorna as medidas da execução."""
+    url = site.search_url("Bench")
+    limiter = RateLimiter(rate=taxa)
+    before = site.stats()
+    start = time.perf_counter()
+    if assincrono:
+        scraper = AsyncDoctorScraper(url, "Bench", concurrency=concorrencia, parser=parser, limiter=limiter,
+                                     depth=profundidade)
+        scraper.parser = timed = TimedParser(scraper.parser)
+
+        async def scrape():
+            try:
+                return await scraper.scrape()
+            finally:
+                await scraper.aclose()
+
+        records = asyncio.run(scrape())
+    else:
+        scraper = DoctorScraper(url, "Bench", parser=parser, limiter=limiter, depth=profundidade)
+        scraper.parser = timed = TimedParser(scraper.parser)
+        try:
+            records = scraper.scrape()
+        finally:
+            scraper.close()
+    elapsed = time.perf_counter() - start
+    after = site.stats()
+
+    requests = after["requests"] - before["requests"]
+    return {
+        "engine": "async" if assincrono else "sync",
+        "depth": profundidade,
+        "parser": timed.name,
+        "doctors": len(records),
+        "seconds": round(elapsed, 3),
+        "doctors_per_second": round(len(records) / elapsed, 2),
+        "requests": requests,
+        "requests_per_second": round(requests / elapsed, 2),
+        "server_errors": after["errors"] - before["errors"],
+        "retries": limiter.retries,
+        "pages_parsed": timed.pages,
+        "parse_ms_per_page": round(1000 * timed.seconds / timed.pages, 3) if timed.pages else 0.0,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do scraper contra um site local que imita o Doctoralia.")
+    parser.add_argument("--medicos", type=int, default=200, help="Número de médicos do site local (padrão: 200).")
+    parser.add_argument("--reviews", type=int, default=25, help="Reviews por médico (padrão: 25).")
+    parser.add_argument("--perguntas", type=int, default=3, help="Perguntas por médico (padrão: 3).")
+    parser.add_argument("--latencia", type=float, default=0.0, help="Latência de cada resposta, em ms (padrão: 0).")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Variação aleatória somada à latência, em ms (padrão: 0).")
+    parser.add_argument("--erros", type=float, default=0.0, help="Fração das respostas devolvidas com 429/503 (padrão: 0).")
+    parser.add_argument("--tamanho_kb", type=int, default=30, help="Marcação extra em cada página HTML, em KB (padrão: 30).")
+    parser.add_argument("--assincrono", action="store_true", help="Usar o scraper assíncrono.")
+    parser.add_argument("--concorrencia", type=int, default=10, help="Requisições simultâneas no modo assíncrono (padrão: 10).")
+    parser.add_argument("--parser", choices=available_parsers(), default=None, help="Backend de parsing HTML.")
+    parser.add_argument("--profundidade", choices=DEPTHS, default="qa", help="Profundidade da raspagem (padrão: qa).")
+    parser.add_argument("--taxa", type=float, default=1000.0, help="Limite de requisições por segundo (padrão: 1000).")
+    parser.add_argument("--saida", default=None, help="Arquivo JSON onde gravar o resultado (opcional).")
+    args = parser.parse_args()
+
+    config = SiteConfig(
+        doctors=args.medicos,
+        reviews=args.reviews,
+        questions=args.perguntas,
+        latency=args.latencia / 1000,
+        jitter=args.jitter / 1000,
+        error_rate=args.erros,
+        filler_kb=args.tamanho_kb,
+    )
+    # Os logs por página e por perfil distorcem a medida; só avisos e erros são mantidos
+    logger.setLevel(logging.WARNING)
+    with LocalSite(config) as site:
+        result = run_benchmark(site, args.assincrono, args.concorrencia, args.parser, args.taxa, args.profundidade)
+
+    print(json.dumps(result, indent=2))
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as file:
+            json.dump(result, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
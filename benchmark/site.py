@@ -0,0 +1,278 @@
+import re
+import json
+import time
+import random
+import threading
+import multiprocessing
+from dataclasses import dataclass, asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import httpx
+
+SPECIALTIES = ["Cardiologista", "Clínico geral", "Dermatologista", "Ginecologista", "Ortopedista", "Pediatra", "Psiquiatra"]
+INSURANCES = ["Unimed", "Bradesco Saúde", "SulAmérica", "Amil", "Porto Seguro"]
+SERVICES = ["Consulta", "Retorno", "Teleconsulta", "Eletrocardiograma", "Check-up"]
+WORDS = ("paciente atendimento consulta exame tratamento clínica saúde acompanhamento "
+         "diagnóstico cuidado orientação retorno sintomas medicamento").split()
+
+
+@dataclass
+class SiteConfig:
+    """Parâmetros do site local que imita o Doctoralia."""
+    doctors: int = 200
+    per_page: int = 20
+    districts: int = 12
+    reviews: int = 25
+    reviews_per_page: int = 10
+    questions: int = 3
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    filler_kb: int = 30
+    seed: int = 42
+
+
+class FakeDoctoralia:
+    """
+    Gera as páginas do site local: busca (com paginação `a.page-link` e o
+    JSON `AVAILABLE_FILTERS`), perfis, o endpoint JSON `doctor-opinions`,
+    páginas de perguntas e respostas completas.
+
+    O conteúdo é determinístico (depende só de `SiteConfig.seed`), então
+    duas execuções do benchmark raspam exatamente os mesmos dados.
+    """
+
+    def __init__(self, config: SiteConfig, origin: str):
+        self.config = config
+        self.origin = origin
+        self.filler = self._filler(config.filler_kb)
+
+    def _rng(self, *key) -> random.Random:
+        return random.Random(f"{self.config.seed}:{':'.join(map(str, key))}")
+
+    def _text(self, rng: random.Random, words: int) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+    def _filler(self, kb: int) -> str:
+        """Marcação sem dados, para aproximar o tamanho e a profundidade das páginas reais."""
+        block = '<div class="row"><div class="col"><span class="text-muted">Lorem ipsum dolor sit amet</span></div></div>'
+        return f'<div class="filler">{block * (kb * 1024 // len(block))}</div>'
+
+    def district_of(self, doctor: int) -> int:
+        return doctor % self.config.districts + 1
+
+    def profile_url(self, doctor: int) -> str:
+        return f"{self.origin}/dr-{doctor}/medico/bench"
+
+    def _specialties(self, doctor: int) -> list:
+        return self._rng("specialties", doctor).sample(SPECIALTIES, 2)
+
+    def search(self, query: dict) -> str:
+        districts = {int(key) for key in query.get("filters[districts][]", [])}
+        doctors = [i for i in range(self.config.doctors) if not districts or self.district_of(i) in districts]
+        page = int(query.get("page", ["1"])[0])
+        pages = max(1, -(-len(doctors) // self.config.per_page))
+        items = "".join(self._listing_item(i) for i in doctors[(page - 1) * self.config.per_page:page * self.config.per_page])
+        pagination = "".join(f'<li><a class="page-link" href="#">{p}</a></li>' for p in range(1, pages + 1))
+        filters = json.dumps([
+            {"name": "specializations", "items": [{"key": k, "name": s} for k, s in enumerate(SPECIALTIES, 1)]},
+            {"name": "districts", "items": [{"key": k, "name": f"Bairro {k}"} for k in range(1, self.config.districts + 1)]},
+        ], ensure_ascii=False)
+        return (
+            f'<html><head><script>window.CONFIG = {{AVAILABLE_FILTERS: {filters}, ACTIVE_FILTERS: []}};</script></head>'
+            f'<body>{self.filler}<div id="search-content"><ul>{items}</ul></div>'
+            f'<ul class="pagination">{pagination}<li><a class="page-link" aria-label="next" href="#">&gt;</a></li></ul>'
+            f'</body></html>'
+        )
+
+    def _listing_item(self, doctor: int) -> str:
+        return (
+            f'<li><div class="card"><div class="dp-doctor-card"></div><span>CRM {10000 + doctor}</span>'
+            f'<a href="{self.profile_url(doctor)}"><span itemprop="name">Dr. Médico {doctor}</span></a>'
+            f'<span class="opinion-numeral">{self.config.reviews} opiniões</span>'
+            f'<span data-test-id="doctor-specializations">{", ".join(self._specialties(doctor))}</span></div></li>'
+        )
+
+    def _review(self, doctor: int, index: int) -> str:
+        rng = self._rng("review", doctor, index)
+        return (
+            f'<div class="opinion d-block"><span itemprop="name">Paciente {index}</span>'
+            f'<time>{2020 + index % 5}-{index % 12 + 1:02d}-{index % 28 + 1:02d}</time>'
+            f'<p itemprop="reviewBody">{self._text(rng, 30)}</p></div>'
+        )
+
+    def profile(self, doctor: int) -> str:
+        rng = self._rng("profile", doctor)
+        services = "".join(
+            f'<div><p itemprop="availableService">{service}</p><div class="mr-1">R$ {rng.randint(100, 600)}</div></div>'
+            for service in rng.sample(SERVICES, 3)
+        )
+        reviews = "".join(self._review(doctor, j) for j in range(min(self.config.reviews, self.config.reviews_per_page)))
+        return (
+            f'<html><body>{self.filler}'
+            f'<div class="unified-doctor-header-info__name"><span itemprop="name">Dr. Médico {doctor}</span></div>'
+            f'<div class="about-description">{self._text(rng, 60)}</div><div data-doctor-id="{doctor}"></div>'
+            f'<div class="modal-body"><div class="mb-3">Formação</div><div class="mb-2">Universidade {doctor % 7}</div>'
+            f'<div class="mb-2">Redes sociais <a target="_blank" href="https://instagram.com/dr{doctor}">Instagram</a></div></div>'
+            f'<div data-id="check-your-insurance-vue"><p class="text-muted">{", ".join(rng.sample(INSURANCES, 2))}</p></div>'
+            f'<div data-test-id="doctor-address-allowed-patients">Adultos e crianças</div>'
+            f'<div data-id="services-list-container">{services}</div>'
+            f'{reviews}'
+            f'<a data-patient-app-event-name="dp-load-more-questions" href="{self.origin}/dr-{doctor}/perguntas">Ver perguntas</a>'
+            f'</body></html>'
+        )
+
+    def opinions(self, doctor: int, page: int) -> dict:
+        limit = self.config.reviews_per_page
+        html = "".join(self._review(doctor, j) for j in range((page - 1) * limit, min(page * limit, self.config.reviews)))
+        return {"html": html, "numRows": self.config.reviews, "limit": limit}
+
+    def questions(self, doctor: int) -> str:
+        blocks = []
+        for k in range(self.config.questions):
+            rng = self._rng("question", doctor, k)
+            # Metade das respostas vem truncada, com link para a resposta completa
+            answer = (f'{self._text(rng, 15)} <a href="{self.origin}/perguntas-respostas/resposta/{doctor}-{k}">ver mais</a>'
+                      if k % 2 else self._text(rng, 25))
+            blocks.append(
+                f'<div data-id="question-box"><p class="doctor-question-body">{self._text(rng, 12)}</p>'
+                f'<div class="text-muted"><a href="#">{SPECIALTIES[k % len(SPECIALTIES)]}</a></div>'
+                f'<time>2024-0{k % 9 + 1}-10</time><p class="mb-0" itemprop="text">{answer}</p></div>'
+            )
+        return f'<html><body>{self.filler}{"".join(blocks)}</body></html>'
+
+    def answer(self, doctor: int, question: int) -> str:
+        rng = self._rng("answer", doctor, question)
+        return f'<html><body>{self.filler}<div class="doctor-answer-content">{self._text(rng, 80)}</div></body></html>'
+
+
+ROUTES = [
+    ("opinions", re.compile(r"^/ajax/mobile/doctor-opinions/(\d+)/(\d+)$")),
+    ("answer", re.compile(r"^/perguntas-respostas/resposta/(\d+)-(\d+)$")),
+    ("questions", re.compile(r"^/dr-(\d+)/perguntas$")),
+    ("profile", re.compile(r"^/dr-(\d+)/[^/]+/bench$")),
+]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: bytes = b"", content_type: str = "text/html; charset=utf-8", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        parts = urlsplit(self.path)
+        if parts.path == "/__stats":
+            with server.lock:
+                body = json.dumps(server.stats).encode()
+            return self._send(200, body, "application/json")
+
+        config = server.site.config
+        with server.lock:
+            rng_value = server.rng.random()
+            delay = config.latency + server.rng.uniform(0, config.jitter)
+        if delay:
+            time.sleep(delay)
+
+        endpoint, args = "search", ()
+        if parts.path != "/pesquisa":
+            for name, pattern in ROUTES:
+                match = pattern.match(parts.path)
+                if match:
+                    endpoint, args = name, tuple(int(group) for group in match.groups())
+                    break
+            else:
+                endpoint = None
+
+        with server.lock:
+            server.stats["requests"] += 1
+            if endpoint:
+                server.stats[endpoint] = server.stats.get(endpoint, 0) + 1
+
+        if endpoint and rng_value < config.error_rate:
+            with server.lock:
+                server.stats["errors"] += 1
+            if rng_value < config.error_rate / 2:
+                return self._send(429, headers={"Retry-After": "0"})
+            return self._send(503)
+
+        site = server.site
+        if endpoint == "search":
+            return self._send(200, site.search(parse_qs(parts.query)).encode())
+        if endpoint == "opinions":
+            return self._send(200, json.dumps(site.opinions(*args)).encode(), "application/json")
+        if endpoint == "answer":
+            return self._send(200, site.answer(*args).encode())
+        if endpoint == "questions":
+            return self._send(200, site.questions(*args).encode())
+        if endpoint == "profile":
+            return self._send(200, site.profile(*args).encode())
+        return self._send(404)
+
+
+def _serve(config: dict, ready) -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    site_config = SiteConfig(**config)
+    server.site = FakeDoctoralia(site_config, f"http://127.0.0.1:{server.server_address[1]}")
+    server.rng = random.Random(site_config.seed)
+    server.lock = threading.Lock()
+    server.stats = {"requests": 0, "errors": 0}
+    ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+class LocalSite:
+    """
+    Sobe o site local em um processo separado, para que a memória e a CPU do
+    servidor não entrem nas medidas do scraper.
+
+    Uso:
+        with LocalSite(SiteConfig(doctors=100, latency=0.05)) as site:
+            DoctorScraper(site.search_url("Bench"), "Bench").scrape()
+            site.stats()
+    """
+
+    def __init__(self, config: SiteConfig = None):
+        self.config = config or SiteConfig()
+        self.origin = None
+        self._process = None
+
+    def start(self) -> "LocalSite":
+        ready = multiprocessing.Queue()
+        self._process = multiprocessing.Process(target=_serve, args=(asdict(self.config), ready), daemon=True)
+        self._process.start()
+        self.origin = f"http://127.0.0.1:{ready.get(timeout=30)}"
+        return self
+
+    def search_url(self, city: str = "Bench") -> str:
+        """URL da primeira página da busca, no mesmo formato das URLs de `data/cities.json`."""
+        return f"{self.origin}/pesquisa?q=&loc={city}&filters%5Bentity_type%5D%5B0%5D=doctor&sorter=rating&page=1"
+
+    def stats(self) -> dict:
+        """Contadores de requisições do servidor, no total e por endpoint."""
+        return httpx.get(f"{self.origin}/__stats").json()
+
+    def stop(self) -> None:
+        if self._process:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -1,72 +1,252 @@
+import os
 import json
 import argparse
-from src.scraper import DoctorScraper
+from typing import Iterator
+from src.dedup import write_associations
+from src.distributed import LEASE_SECONDS, run_coordinator, run_worker
+from src.parallel import run_parallel
+from src.pipeline import (
+    ASSOCIATIONS_PATH,
+    CONSOLIDATED_PATH,
+    build_scraper_options,
+    city_output_path,
+    close_scraper_options,
+    plan_cities,
+    scrape_to_file,
+)
+from src.http_client import KEEPALIVE_EXPIRY
+from src.metrics import MetricsExporter, profile_run
+from src.parquet_sink import parquet_available
+from src.scheduler import ProgressTracker, largest_first, plan_cost
+from src.scraper import DEPTHS
+from src.sink import append_file
+from src.snapshot import write_removals
+from src.work_queue import open_queue
 from utils.setup_logger import logger
+from utils.html_parser import available_parsers
 
 
-def process_city(city: str, url: str):
-    """Processa a raspagem de uma cidade específica."""
-    scraper = DoctorScraper(base_url=url, city=city)
-    city_data = scraper.scrape()
+def process_city(city: str, url: str, assincrono: bool = False, concorrencia: int = 10, parquet: bool = False,
+                 delta: bool = False, targets: list = None, **scraper_options) -> str:
+    """
+    Processa a raspagem de uma cidade específica, gravando os registros em
+    NDJSON à medida que são coletados. Retorna o caminho do arquivo da cidade.
 
-    # Salvar os dados da cidade em um arquivo JSON
+    `targets` é o plano de listagens já sondado (opcional). `scraper_options`
+    são repassadas ao scraper (ex.: `parser`, `cache`, `frontier`, `profile_index`).
+    """
+    path = city_output_path(city)
     try:
-        with open(f"data/{city.replace(' ', '_')}.json", "w", encoding="utf-8") as file:
-            json.dump(city_data, file, ensure_ascii=False, indent=4)
-        logger.info(f"Raspagem da cidade: {city} concluída e dados salvos em data/{city.replace(' ', '_')}.json.")
+        count, _ = scrape_to_file(city, url, path, assincrono, concorrencia, targets, parquet=parquet, delta=delta,
+                               **scraper_options)
+        logger.info(f"Raspagem da cidade: {city} concluída e {count} registros salvos em {path}.")
     except Exception as e:
-        logger.error(f"Erro ao salvar os dados da cidade {city}: {e}")
+        logger.error(f"Erro ao raspar ou salvar os dados da cidade {city}: {e}")
 
-    return city_data
+    return path
 
 
-def main():
-    # Configurar o parser de argumentos
-    parser = argparse.ArgumentParser(description="Script para raspagem de dados do Doctoralia.")
-    parser.add_argument("--cidade", nargs="?", default=None, help="Nome da cidade a ser processada (opcional).")
-    parser.add_argument("--save_all", nargs="?", default=None, help="Salvar todos os dados em um único JSON (opcional).")
+def consolidate(paths: list) -> None:
+    """Monta o arquivo consolidado concatenando os arquivos NDJSON das cidades."""
+    try:
+        open(CONSOLIDATED_PATH, "w").close()
+        for path in paths:
+            if os.path.exists(path):
+                append_file(path, CONSOLIDATED_PATH)
+        logger.info(f"Dados consolidados salvos em {CONSOLIDATED_PATH}.")
+    except Exception as e:
+        logger.error(f"Erro ao salvar os dados consolidados: {e}")
 
-    args = parser.parse_args()
 
-    # Carregar as cidades e URLs do arquivo JSON
+def process_cities(args, cities: dict, scraper_options: dict) -> Iterator[str]:
+    """
+    Raspa as cidades uma a uma, da maior para a menor, produzindo o caminho
+    do arquivo de cada cidade assim que ela termina.
+
+    O tamanho de cada cidade é sondado antes (páginas e grupos de bairros);
+    o plano sondado é reaproveitado na raspagem e o progresso, com o tempo
+    estimado até o fim, vai sendo registrado no log.
+    """
+    plans = plan_cities(cities, scraper_options, args.assincrono, args.concorrencia)
+    costs = {city: plan_cost(targets) for city, targets in plans.items()}
+    options = {**scraper_options, "progress": ProgressTracker(sum(costs.values()))}
+    for city in largest_first(costs):
+        # Com fronteira, o plano fica guardado nela e a cidade é retomada com os registros anteriores
+        targets = plans[city] if plans[city] and not scraper_options["frontier"] else None
+        yield process_city(city, cities[city], args.assincrono, args.concorrencia, args.parquet,
+                           args.incremental, targets, **options)
+
+
+def run_distributed(args, cities: dict, scraper_options: dict) -> None:
+    """Executa o coordenador ou um worker do modo distribuído sobre a fila `--fila`."""
+    queue = open_queue(args.fila)
     try:
-        with open("data/cities.json", "r", encoding="utf-8") as file:
-            cities = json.load(file)
-    except FileNotFoundError:
-        logger.error("Arquivo cities.json não encontrado.")
-        exit(1)
+        if args.worker:
+            run_worker(queue, scraper_options, lease_seconds=args.lease)
+            return
+
+        selected = cities
+        if args.cidade:
+            if args.cidade not in cities:
+                logger.error(f"Cidade '{args.cidade}' não encontrada no arquivo cities.json.")
+                exit(1)
+            selected = {args.cidade: cities[args.cidade]}
+        if args.nova:
+            queue.reset()
+            logger.info(f"Fila {args.fila} limpa para uma nova raspagem.")
+        paths = run_coordinator(queue, selected, args.parquet, scraper_options["snapshot"])
+        if not args.cidade or args.save_all:
+            consolidate(paths)
+        # Os perfis repetidos entram na fila uma única vez; as cidades e bairros de cada um ficam na fila
+        total = write_associations(queue.associations(), ASSOCIATIONS_PATH)
+        logger.info(f"{total} perfis encontrados em mais de uma cidade ou bairro; associações salvas em {ASSOCIATIONS_PATH}.")
+    finally:
+        queue.close()
+
+
+def run(args, cities: dict, config: dict, scraper_options: dict) -> None:
+    """Raspa as cidades selecionadas pelos argumentos da linha de comando."""
+    if args.coordenador or args.worker:
+        run_distributed(args, cities, scraper_options)
+
+    elif args.workers > 1:
+        selected = cities
+        if args.cidade:
+            if args.cidade not in cities:
+                logger.error(f"Cidade '{args.cidade}' não encontrada no arquivo cities.json.")
+                exit(1)
+            selected = {args.cidade: cities[args.cidade]}
+        logger.info(f"Processando {len(selected)} cidade(s) com {args.workers} processos.")
+        paths = run_parallel(selected, config, args.workers, scraper_options)
+        if not args.cidade or args.save_all:
+            consolidate(paths)
 
     # Processar cidade específica ou todas as cidades
-    all_data = []
-    if args.cidade:
+    elif args.cidade:
         cidade = args.cidade
         if cidade in cities:
             logger.info(f"Processando somente a cidade: {cidade}")
-            city_data = process_city(cidade, cities[cidade])
-            all_data.extend(city_data)
+            paths = list(process_cities(args, {cidade: cities[cidade]}, scraper_options))
+            if args.save_all:
+                consolidate(paths)
         else:
             logger.error(f"Cidade '{cidade}' não encontrada no arquivo cities.json.")
             exit(1)
     else:
         logger.info("Processando todas as cidades.")
-        for city, url in cities.items():
-            city_data = process_city(city, url)
-            all_data.extend(city_data)
+        open(CONSOLIDATED_PATH, "w").close()
+        for path in process_cities(args, cities, scraper_options):
+            # Acrescenta a cidade ao consolidado assim que ela termina
             try:
-                with open("data/doctolaria.json", "w", encoding="utf-8") as file:
-                    json.dump(all_data, file, ensure_ascii=False, indent=4)
-                logger.info("Raspagem concluída para todas as cidades. Dados consolidados salvos em data/doctolaria.json.")
+                append_file(path, CONSOLIDATED_PATH)
             except Exception as e:
                 logger.error(f"Erro ao salvar os dados consolidados: {e}")
+        logger.info(f"Raspagem concluída para todas as cidades. Dados consolidados salvos em {CONSOLIDATED_PATH}.")
+
+
+def main():
+    # Configurar o parser de argumentos
+    parser = argparse.ArgumentParser(description="Script para raspagem de dados do Doctoralia.")
+    parser.add_argument("--cidade", nargs="?", default=None, help="Nome da cidade a ser processada (opcional).")
+    parser.add_argument("--save_all", nargs="?", default=None, help="Salvar todos os dados em um único arquivo NDJSON (opcional).")
+    parser.add_argument("--assincrono", action="store_true", help="Usar o scraper assíncrono, com requisições em paralelo (opcional).")
+    parser.add_argument("--concorrencia", type=int, default=10, help="Número máximo de requisições simultâneas no modo assíncrono (padrão: 10).")
+    parser.add_argument("--profundidade", choices=DEPTHS, default="qa", help="Até onde raspar cada médico: `listing` (só os dados da listagem), `profile` (perfil, com as reviews da primeira página), `reviews` (todas as reviews) ou `qa` (também perguntas e respostas; padrão).")
+    parser.add_argument("--parquet", action="store_true", help="Gravar também tabelas Parquet normalizadas (médicos, reviews, serviços, perguntas e redes sociais) em data/parquet (opcional, requer pyarrow).")
+    parser.add_argument("--incremental", action="store_true", help="Raspagem incremental: reaproveita os detalhes dos médicos cujos dados na listagem não mudaram desde a última execução (data/snapshot.db) e grava os médicos novos, alterados e removidos em data/delta (opcional).")
+    parser.add_argument("--cache", action="store_true", help="Guardar as respostas HTTP em cache local (data/cache) e reaproveitá-las (opcional).")
+    parser.add_argument("--cache_max_mb", type=int, default=2048, help="Tamanho máximo do cache HTTP em MB (padrão: 2048).")
+    parser.add_argument("--offline", action="store_true", help="Reprocessar somente a partir do cache, sem acessar a rede (opcional).")
+    parser.add_argument("--retomar", action="store_true", help="Registrar o progresso em data/frontier.db e continuar de onde a última execução parou (opcional).")
+    parser.add_argument("--workers", type=int, default=1, help="Número de processos para raspar cidades (e grupos de bairros) em paralelo (padrão: 1).")
+    parser.add_argument("--coordenador", action="store_true", help="Modo distribuído: enfileirar as cidades em --fila, aguardar os workers e gravar os resultados (opcional).")
+    parser.add_argument("--worker", action="store_true", help="Modo distribuído: processar unidades de --fila (cidades, páginas de listagem e perfis) até a fila esvaziar (opcional).")
+    parser.add_argument("--fila", default="data/queue.db", help="Fila do modo distribuído, no formato `backend://local` (padrão: data/queue.db, em SQLite).")
+    parser.add_argument("--nova", action="store_true", help="Com --coordenador, limpar --fila antes de enfileirar, começando uma nova raspagem em vez de continuar a anterior (opcional).")
+    parser.add_argument("--lease", type=float, default=LEASE_SECONDS, help=f"Segundos que um worker tem para concluir ou renovar uma unidade antes que ela volte para a fila (padrão: {LEASE_SECONDS}).")
+    parser.add_argument("--conexoes", type=int, default=None, help="Máximo de conexões HTTP abertas por processo, reaproveitadas entre requisições (padrão: 20, ou --concorrencia se for maior).")
+    parser.add_argument("--keepalive", type=float, default=KEEPALIVE_EXPIRY, help=f"Segundos que uma conexão ociosa fica aberta no pool para ser reaproveitada (padrão: {KEEPALIVE_EXPIRY:.0f}).")
+    parser.add_argument("--http2", action="store_true", help="Usar HTTP/2 quando o site suportar, multiplexando as requisições em poucas conexões (opcional, requer h2).")
+    parser.add_argument("--timeout_conexao", type=float, default=None, help="Tempo máximo, em segundos, para abrir uma conexão (padrão: 5).")
+    parser.add_argument("--timeout_leitura", type=float, default=None, help="Tempo máximo, em segundos, para ler uma resposta (padrão: 10 a 20, conforme o tipo de página).")
+    parser.add_argument("--taxa", type=float, default=10.0, help="Máximo de requisições por segundo, somando todos os processos (padrão: 10). A taxa cai automaticamente quando o site responde com erros.")
+    parser.add_argument("--tentativas", type=int, default=5, help="Número de novas tentativas de uma requisição após bloqueio (429), erro do servidor ou de rede (padrão: 5).")
+    parser.add_argument("--metricas", default=None, help="Arquivo onde gravar as métricas por endpoint durante e ao final da execução: `.prom` para o formato do Prometheus, JSON nos demais casos (opcional).")
+    parser.add_argument("--metricas_intervalo", type=float, default=30.0, help="Intervalo, em segundos, entre as gravações das métricas (padrão: 30).")
+    parser.add_argument("--perfil", choices=["cprofile", "pyinstrument"], default=None, help="Executar a raspagem sob um profiler (opcional). O resultado é salvo em data/profile.prof (cProfile) ou data/profile.html (pyinstrument).")
+    parser.add_argument("--parser", choices=available_parsers(), default=None, help="Backend de parsing HTML (padrão: bs4; lxml é mais rápido, se instalado).")
+
+    args = parser.parse_args()
+    if args.coordenador and args.worker:
+        logger.error("Use --coordenador ou --worker, não os dois.")
+        exit(1)
+    if args.nova and not args.coordenador:
+        logger.error("A opção --nova só vale com --coordenador.")
+        exit(1)
+    if args.parquet and not parquet_available():
+        logger.error("A opção --parquet requer o pyarrow: pip install pyarrow")
+        exit(1)
+
+    # Carregar as cidades e URLs do arquivo JSON
+    try:
+        with open("data/cities.json", "r", encoding="utf-8") as file:
+            cities = json.load(file)
+    except FileNotFoundError:
+        logger.error("Arquivo cities.json não encontrado.")
+        exit(1)
+
+    config = {
+        "parser": args.parser,
+        "cache": args.cache,
+        "cache_max_mb": args.cache_max_mb,
+        "offline": args.offline,
+        "retomar": args.retomar,
+        "assincrono": args.assincrono,
+        "concorrencia": args.concorrencia,
+        "taxa": args.taxa,
+        "tentativas": args.tentativas,
+        "workers": args.workers,
+        "parquet": args.parquet,
+        "profundidade": args.profundidade,
+        "incremental": args.incremental,
+        "conexoes": args.conexoes,
+        "keepalive": args.keepalive,
+        "http2": args.http2,
+        "timeout_conexao": args.timeout_conexao,
+        "timeout_leitura": args.timeout_leitura,
+    }
+    scraper_options = build_scraper_options(config)
+    if args.offline:
+        logger.info("Modo offline: as respostas serão lidas somente do cache.")
+    if scraper_options["frontier"]:
+        scraper_options["frontier"].recover()
+        scraper_options["profile_index"].recover()
+        logger.info("Retomando a partir da fronteira salva em data/frontier.db.")
+    else:
+        scraper_options["profile_index"].reset()
+
+    exporter = None
+    if args.metricas:
+        exporter = MetricsExporter(scraper_options["metrics"], args.metricas, args.metricas_intervalo).start()
+    profile_path = "data/profile.html" if args.perfil == "pyinstrument" else "data/profile.prof"
+
+    try:
+        with profile_run(args.perfil, profile_path):
+            run(args, cities, config, scraper_options)
+
+        if scraper_options["snapshot"]:
+            # Só depois de todas as cidades, para não remover de uma cidade quem foi gravado em outra
+            write_removals(scraper_options["snapshot"])
 
-    if args.save_all:
-        # Salvar os dados consolidados em um único arquivo JSON
-        try:
-            with open("data/doctolaria.json", "w", encoding="utf-8") as file:
-                json.dump(all_data, file, ensure_ascii=False, indent=4)
-            logger.info("Raspagem concluída para todas as cidades. Dados consolidados salvos em data/doctolaria.json.")
-        except Exception as e:
-            logger.error(f"Erro ao salvar os dados consolidados: {e}")
+        if not (args.coordenador or args.worker):
+            # Perfis encontrados em mais de uma cidade/bairro foram raspados uma única vez
+            total = scraper_options["profile_index"].export_associations(ASSOCIATIONS_PATH)
+            logger.info(f"{total} perfis encontrados em mais de uma cidade ou bairro; associações salvas em {ASSOCIATIONS_PATH}.")
+    finally:
+        if exporter:
+            exporter.stop()
+        # Fecha as conexões HTTP e os arquivos de cache, fronteira e índices
+        close_scraper_options(scraper_options)
 
 if __name__ == "__main__":
     main()
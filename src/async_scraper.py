@@ -0,0 +1,380 @@
+import time
+import asyncio
+from typing import AsyncIterator, Optional
+import httpx
+from httpx import HTTPStatusError, RequestError
+
+from src.scraper import (
+    DoctorScraper,
+    MAX_PAGES,
+    REVIEWS_TIMEOUT,
+    district_url,
+    extract_districts,
+    page_url,
+    reviews_last_page,
+    reviews_url,
+)
+from src.dedup import AnswerCache, ProfileIndex
+from src.frontier import Frontier, PAGE_UNIT, TARGETS_UNIT
+from src.http_cache import HttpCache
+from src.http_client import HttpClients
+from src.metrics import Metrics
+from src.partition import DistrictPartitioner
+from src.rate_limit import RateLimiter
+from src.scheduler import ProgressTracker
+from src.snapshot import SnapshotIndex
+from utils.setup_logger import logger
+from utils.endpoints import LISTING, PROFILE, REVIEWS, QUESTIONS, ANSWER
+from utils.parsing import (
+    parse_full_answer,
+    parse_last_page,
+    parse_listing_item,
+    parse_profile,
+    parse_questions,
+    select_listing_items,
+)
+
+
+class AsyncDoctorScraper(DoctorScraper):
+    """
+    Versão assíncrona do `DoctorScraper`.
+
+    Busca páginas de listagem, perfis, reviews e perguntas ao mesmo tempo,
+    limitando o número de requisições simultâneas a `concurrency`. Retorna
+    os registros no mesmo formato de `DoctorScraper.scrape`.
+
+    Todo método do `DoctorScraper` que faz requisições, direta ou
+    indiretamente, é sobrescrito aqui como corrotina; os herdados só montam
+    registros e planos ou tratam da fronteira e dos índices.
+    """
+
+    def __init__(self, base_url: str, city: str, concurrency: int = 10, parser: str = None,
+                 cache: HttpCache = None, frontier: Frontier = None, profile_index: ProfileIndex = None,
+                 limiter: RateLimiter = None, metrics: Metrics = None, answers: AnswerCache = None,
+                 depth: str = "qa", snapshot: SnapshotIndex = None, http: HttpClients = None,
+                 progress: ProgressTracker = None):
+        self.concurrency = concurrency
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._pending_answers = {}
+        super().__init__(base_url, city, parser=parser, cache=cache, frontier=frontier, profile_index=profile_index,
+                         limiter=limiter, metrics=metrics, answers=answers, depth=depth,
+                         snapshot=snapshot, http=http, progress=progress)
+
+    def _create_client(self):
+        """Cria o cliente HTTP assíncrono do scraper, com as configurações de `self.http`."""
+        return self.http.async_client()
+
+    async def aclose(self):
+        """Fecha o cliente HTTP."""
+        await self.client.aclose()
+        self.close()
+
+    async def _get(self, url: str, endpoint: str) -> httpx.Response:
+        """Executa um GET respeitando o limite de requisições simultâneas."""
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                response = await self.client.get(url, timeout=self.http.timeout(endpoint), extensions={"endpoint": endpoint})
+                response.raise_for_status()
+            except (HTTPStatusError, RequestError):
+                self.metrics.observe_request(endpoint, time.perf_counter() - start, error=True)
+                raise
+        self._observe_response(endpoint, response, time.perf_counter() - start)
+        return response
+
+    async def get_last_page(self, url: str) -> Optional[int]:
+        """
+        Obtém o número da última página a partir da paginação.
+
+        Retorna 1 quando a listagem não tem paginação e `None` quando a consulta falhou.
+        """
+        try:
+            response = await self._get(url, LISTING)
+            last_page = self._extract(LISTING, parse_last_page, response.text)
+            if last_page:
+                logger.info(f"Última página encontrada: {last_page}")
+                return last_page
+            else:
+                logger.warning("Não foi possível encontrar a última página.")
+                return 1
+        except (HTTPStatusError, RequestError) as e:
+            logger.error(f"Erro ao obter última página: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Erro inesperado ao obter última página: {e}")
+            return None
+
+    async def get_districts(self, url: str) -> list:
+        """Obtém a lista de bairros disponíveis a partir do JSON embutido no HTML."""
+        try:
+            response = await self._get(url, LISTING)
+            return extract_districts(response.text)
+        except Exception as e:
+            logger.error(f"Erro ao obter lista de bairros: {e}")
+            return []
+
+    async def get_listing_targets(self) -> list:
+        """Define as listagens a serem percorridas, reaproveitando o plano salvo na fronteira."""
+        targets = self._saved_targets()
+        if targets is None:
+            failures = self.failed_pages
+            targets = await self._plan_listing_targets()
+            # Um plano com consultas que falharam não é salvo, para ser refeito na próxima execução
+            if targets and self.failed_pages == failures:
+                self._unit_finish(TARGETS_UNIT, self.base_url, targets)
+        return targets
+
+    async def _plan_listing_targets(self) -> list:
+        """Consulta o site para montar o plano de listagens, consultando os grupos de bairros em paralelo."""
+        last_page = await self.get_last_page(self.base_url)
+        if last_page is None:
+            logger.error("Não foi possível obter o número de páginas da cidade. Abortando.")
+            self.failed_pages += 1
+            return []
+        if last_page <= MAX_PAGES:
+            return [(self.base_url, last_page, None)]
+
+        logger.info(f"Número de páginas ({last_page}) excede o limite de {MAX_PAGES}. Aplicando filtro por bairros.")
+        districts = await self.get_districts(self.base_url)
+        if not districts:
+            logger.error("Não foi possível obter a lista de bairros. Abortando.")
+            self.failed_pages += 1
+            return []
+
+        # Os grupos de cada rodada do particionador são consultados em paralelo
+        partitioner = DistrictPartitioner(districts, MAX_PAGES, total_pages=last_page)
+        while True:
+            batches = partitioner.next_probes()
+            if not batches:
+                break
+            last_pages = await asyncio.gather(*(
+                self.get_last_page(district_url(self.base_url, batch)) for batch in batches
+            ))
+            for batch, pages in zip(batches, last_pages):
+                partitioner.feed(batch, pages)
+        return self._partition_targets(partitioner)
+
+    async def _scrape_item(self, item, district: str = None) -> tuple:
+        """
+        Raspa um médico da listagem.
+
+        Retorna `(registro, sucesso)`; o registro é `None` quando o médico falhou,
+        já tinha sido concluído em uma execução anterior ou é duplicado.
+        """
+        try:
+            row = parse_listing_item(item)
+            if not self._begin_profile(row, district):
+                return None, True
+            record = None
+            try:
+                record = await self.get_record(row)
+            finally:
+                self._end_profile(row, record)
+            return record, record is not None
+        except Exception as e:
+            logger.error(f"Erro ao processar dados de um médico: {e}")
+            return None, False
+
+    async def scrape_page(self, url: str, district: str = None) -> list:
+        """Raspa os dados de uma única página, buscando os perfis em paralelo."""
+        if self._unit_done(PAGE_UNIT, url):
+            logger.info("Página já concluída em execução anterior.")
+            return []
+        try:
+            self._unit_start(PAGE_UNIT, url)
+            response = await self._get(url, LISTING)
+            all_doctors = self._extract(LISTING, select_listing_items, response.text)
+            results = await asyncio.gather(*(self._scrape_item(item, district) for item in all_doctors))
+            if all(complete for _, complete in results):
+                self._unit_finish(PAGE_UNIT, url)
+            else:
+                self.failed_pages += 1
+            doctors = [doctor for doctor, _ in results if doctor]
+            logger.info(f"{len(doctors)} médicos encontrados na página.")
+            return doctors
+        except Exception as e:
+            self.failed_pages += 1
+            logger.error(f"Erro ao raspar página: {e}")
+            return []
+
+    async def get_listing_rows(self, url: str) -> list:
+        """Busca uma página de listagem e extrai os médicos dela, sem buscar os perfis nem tratar erros."""
+        return self._parse_listing_rows((await self._get(url, LISTING)).text)
+
+    async def get_record(self, row: dict) -> dict:
+        """Monta o registro de um médico da listagem conforme a profundidade configurada."""
+        if not self._wants("profile"):
+            return self._build_record(row, {})
+        record = self._reuse_record(row)
+        if record:
+            return record
+        details = await self.get_profile_details(row["link_to_profile"], row["reviews"])
+        return self._build_record(row, details) if details else None
+
+    async def get_profile_details(self, profile_url: str, reviews_count: int) -> dict:
+        """Obtém informações do perfil, buscando reviews e perguntas em paralelo (conforme a profundidade)."""
+        try:
+            response = await self._get(profile_url, PROFILE)
+            details = self._extract(PROFILE, parse_profile, response.text, profile_url)
+            doctor_id = details.pop("doctor_id")
+            link_questions = details.pop("link_questions")
+
+            reviews = details["Patient Reviews"]
+            reviews_task = (
+                self.get_all_reviews(reviews, doctor_id, reviews_count)
+                if len(reviews) < reviews_count and doctor_id and self._wants("reviews")
+                else _resolved(reviews)
+            )
+            if not self._wants("qa"):
+                details["Patient Reviews"] = await reviews_task
+                return details
+            questions_task = self.get_all_questions(link_questions) if link_questions else _resolved([])
+            details["Patient Reviews"], details["Health Questions and Answers"] = await asyncio.gather(
+                reviews_task, questions_task
+            )
+            return details
+        except Exception as e:
+            logger.error(f"Erro ao obter detalhes do perfil: {e}")
+            return {}
+
+    async def _get_reviews_page(self, doctor_id: str, page: int) -> dict:
+        """Busca uma página do endpoint de reviews, validando o formato da resposta."""
+        data = (await self._get(reviews_url(self.base_url, doctor_id, page), REVIEWS)).json()
+        if "html" not in data or "numRows" not in data or "limit" not in data:
+            raise ValueError("Resposta inesperada do endpoint de reviews.")
+        return data
+
+    async def _fetch_reviews_page(self, doctor_id: str, page: int) -> list:
+        """Busca e extrai as reviews de uma página do endpoint."""
+        return self._parse_reviews_page(await self._get_reviews_page(doctor_id, page))
+
+    async def get_all_reviews(self, reviews: list, doctor_id: str, reviews_count: int) -> list:
+        """Obtém todas as reviews, buscando as páginas restantes em paralelo."""
+        try:
+            data = await self._get_reviews_page(doctor_id, 2)
+            pages = {2: self._parse_reviews_page(data)}
+            last_page = reviews_last_page(data["numRows"], data["limit"])
+
+            tasks = {
+                asyncio.ensure_future(self._fetch_reviews_page(doctor_id, page)): page
+                for page in range(3, last_page + 1)
+            }
+            if tasks:
+                done, pending = await asyncio.wait(tasks, timeout=REVIEWS_TIMEOUT)
+                if pending:
+                    logger.warning("Interrompendo: tempo de execução excedeu 20 minutos.")
+                    for task in pending:
+                        task.cancel()
+                for task in done:
+                    try:
+                        pages[tasks[task]] = task.result()
+                    except Exception as e:
+                        logger.warning(f"Erro ao obter a página {tasks[task]} de reviews: {e}")
+
+            for page in sorted(pages):
+                reviews.extend(pages[page])
+
+            logger.info(f"Todas as {len(reviews)} reviews coletadas.")
+            return reviews
+        except Exception as e:
+            logger.error(f"Erro ao obter todas as reviews: {e}")
+            return []
+
+    async def get_all_questions(self, url: str) -> Optional[list]:
+        """
+        Obtém as perguntas e respostas, buscando as respostas completas distintas
+        em paralelo. Retorna `None` se a página de perguntas não pôde ser obtida.
+        """
+        try:
+            response = await self._get(url, QUESTIONS)
+            questions_and_answers = self._extract(QUESTIONS, parse_questions, response.text)
+
+            links = [question.pop("link_answer") for question in questions_and_answers]
+            unique_links = list(dict.fromkeys(link for link in links if link))
+            answers = dict(zip(unique_links, await asyncio.gather(*(self.get_full_answer(link) for link in unique_links))))
+            for question, link in zip(questions_and_answers, links):
+                if link:
+                    question["Answer Text"] = answers[link]
+
+            return questions_and_answers
+        except Exception as e:
+            logger.error(f"Erro ao obter todas as perguntas e respostas: {e}")
+            return None
+
+    async def get_full_answer(self, link: str) -> Optional[str]:
+        """
+        Obtém a resposta completa do profissional a partir da URL. Respostas já
+        buscadas vêm do cache da execução, e perfis simultâneos que pedem a
+        mesma resposta aguardam a mesma requisição. Retorna `None` se a busca falhou.
+        """
+        answer = self.answers.get(link)
+        if answer is not None:
+            self.metrics.increment("answer_cache_hits")
+            return answer
+
+        task = self._pending_answers.get(link)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_full_answer(link))
+            self._pending_answers[link] = task
+            task.add_done_callback(lambda _: self._pending_answers.pop(link, None))
+        else:
+            self.metrics.increment("answer_cache_hits")
+        return await task
+
+    async def _fetch_full_answer(self, link: str) -> Optional[str]:
+        try:
+            response = await self._get(link, ANSWER)
+            answer = self._extract(ANSWER, parse_full_answer, response.text)
+            self.answers.put(link, answer)
+            return answer
+        except Exception as e:
+            logger.error(f"Erro ao obter a resposta completa: {e}")
+            return None
+
+    async def iter_scrape(self, targets: list = None) -> AsyncIterator[dict]:
+        """
+        Orquestra a raspagem, processando várias páginas de listagem ao mesmo
+        tempo e produzindo os registros por janela. `targets` tem o mesmo
+        significado de `DoctorScraper.iter_scrape`.
+        """
+        logger.info(f"Iniciando raspagem assíncrona para a cidade: {self.city} (concorrência: {self.concurrency})")
+        total = 0
+        if self.frontier and targets is None:
+            for record in self.frontier.records(self.city):
+                total += 1
+                yield record
+            if total:
+                logger.info(f"{total} médicos recuperados da fronteira.")
+
+        if targets is None:
+            targets = await self.get_listing_targets()
+        if not targets:
+            self.failed_pages += 1
+        pages = [
+            (page_url(url, page), label)
+            for url, last_page, label in targets
+            for page in range(1, last_page + 1)
+        ]
+
+        # As páginas são processadas em janelas para não criar todas as tarefas de uma vez
+        for start in range(0, len(pages), self.concurrency):
+            window = pages[start:start + self.concurrency]
+            logger.info(f"Raspando páginas {start + 1}-{start + len(window)}/{len(pages)}...")
+            for doctors in await asyncio.gather(*(self.scrape_page(url, label) for url, label in window)):
+                for record in doctors:
+                    total += 1
+                    self.metrics.increment("doctors")
+                    yield record
+            if self.progress:
+                self.progress.advance(len(window))
+
+        logger.info(f"Raspagem concluída para {self.city}. Total de médicos: {total}")
+
+    async def scrape(self) -> list:
+        """Orquestra a raspagem, retornando todos os registros da cidade."""
+        return [record async for record in self.iter_scrape()]
+
+
+async def _resolved(value):
+    """Corrotina que apenas devolve o valor recebido, usada junto com `asyncio.gather`."""
+    return value
@@ -0,0 +1,167 @@
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from src.sink import NDJSONSink
+from utils.setup_logger import logger
+
+CLAIMED = "claimed"
+DONE = "done"
+
+
+def normalize_profile_url(url: str) -> str:
+    """Normaliza a URL do perfil: esquema e domínio em minúsculas, sem query, fragmento ou barra final."""
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), "", ""))
+
+
+def write_associations(rows, path: str) -> int:
+    """
+    Grava em NDJSON as associações `(url, cidade, bairro)`, ordenadas por URL,
+    com uma linha por perfil. Retorna o número de perfis gravados.
+    """
+    with NDJSONSink(path) as sink:
+        current = None
+        for url, city, district in rows:
+            if current and current["link_to_profile"] != url:
+                sink.write(current)
+                current = None
+            if current is None:
+                current = {"link_to_profile": url, "associations": []}
+            current["associations"].append({"city": city, "district": district or None})
+        if current:
+            sink.write(current)
+    return sink.count
+
+
+class ProfileIndex:
+    """
+    Índice de perfis já processados na execução, compartilhado entre páginas,
+    grupos de bairros, cidades e processos.
+
+    O primeiro scraper que encontra um perfil o "reivindica" e busca os
+    detalhes; as demais ocorrências só registram a associação extra com a
+    cidade ou o grupo de bairros, sem repetir a busca do perfil.
+    """
+
+    def __init__(self, path: str = "data/profile_index.db"):
+        self.path = path
+        self.duplicates = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS profiles (
+                    url TEXT PRIMARY KEY,
+                    status TEXT,
+                    updated_at REAL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS associations (
+                    url TEXT,
+                    city TEXT,
+                    district TEXT,
+                    UNIQUE (url, city, district)
+                )
+            """)
+
+    def reset(self) -> None:
+        """Limpa o índice para uma nova execução."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM profiles")
+            self._conn.execute("DELETE FROM associations")
+
+    def recover(self) -> None:
+        """Libera os perfis reivindicados por uma execução interrompida antes de serem concluídos."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM profiles WHERE status = ?", (CLAIMED,))
+
+    def claim(self, url: str, city: str, district: str = None) -> bool:
+        """
+        Registra a ocorrência do perfil em `city`/`district`.
+
+        Retorna `True` se é a primeira ocorrência (o chamador deve buscar os
+        detalhes) e `False` se o perfil já foi ou está sendo processado.
+        """
+        key = normalize_profile_url(url)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO associations VALUES (?, ?, ?)", (key, city, district or "")
+            )
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO profiles VALUES (?, ?, ?)", (key, CLAIMED, time.time())
+            )
+        if cursor.rowcount == 0:
+            self.duplicates += 1
+            logger.debug(f"Perfil duplicado ignorado: {key} ({city}{', ' + district if district else ''})")
+            return False
+        return True
+
+    def complete(self, url: str) -> None:
+        """Marca o perfil como concluído."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE profiles SET status = ?, updated_at = ? WHERE url = ?",
+                (DONE, time.time(), normalize_profile_url(url)),
+            )
+
+    def release(self, url: str) -> None:
+        """Libera um perfil cuja busca falhou, para que uma próxima ocorrência tente de novo."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM profiles WHERE url = ? AND status = ?", (normalize_profile_url(url), CLAIMED)
+            )
+
+    def export_associations(self, path: str) -> int:
+        """
+        Grava em NDJSON as cidades e grupos de bairros de cada perfil que
+        apareceu em mais de um lugar. Retorna o número de perfis gravados.
+        """
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT url, city, district FROM associations
+                WHERE url IN (SELECT url FROM associations GROUP BY url HAVING COUNT(*) > 1)
+                ORDER BY url, rowid
+            """).fetchall()
+        return write_associations(rows, path)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class AnswerCache:
+    """
+    Respostas completas já buscadas na execução, compartilhadas por todos os
+    scrapers do processo. Uma mesma resposta pode aparecer em várias páginas
+    de perguntas; com o cache ela é buscada uma única vez.
+
+    Guarda no máximo `max_entries` respostas, descartando as usadas há mais
+    tempo.
+    """
+
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, link: str) -> Optional[str]:
+        with self._lock:
+            answer = self._entries.get(link)
+            if answer is not None:
+                self._entries.move_to_end(link)
+            return answer
+
+    def put(self, link: str, answer: str) -> None:
+        with self._lock:
+            self._entries[link] = answer
+            self._entries.move_to_end(link)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
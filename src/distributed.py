@@ -0,0 +1,199 @@
+import os
+import time
+import socket
+import threading
+
+from src.dedup import normalize_profile_url
+from src.pipeline import city_output_path, city_parquet_sink
+from src.scraper import DoctorScraper, page_url
+from src.sink import MultiSink, NDJSONSink
+from src.snapshot import DeltaSink, SnapshotIndex
+from src.work_queue import CITY_UNIT, DONE, FAILED, LEASED, PAGE_UNIT, PENDING, PROFILE_UNIT, WorkQueue, WorkUnit
+from utils.setup_logger import logger
+
+LEASE_SECONDS = 10 * 60
+POLL_INTERVAL = 5.0
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue_cities(queue: WorkQueue, cities: dict) -> int:
+    """Enfileira uma unidade de planejamento por cidade. Cidades já enfileiradas são ignoradas."""
+    return queue.put([WorkUnit(CITY_UNIT, url, city, {"base_url": url}) for city, url in cities.items()])
+
+
+def run_coordinator(queue: WorkQueue, cities: dict, parquet: bool = False, snapshot: SnapshotIndex = None,
+                    poll_interval: float = POLL_INTERVAL) -> list:
+    """
+    Coordena a raspagem distribuída: enfileira as cidades, acompanha a fila
+    até não haver unidades pendentes nem alugadas e grava o arquivo NDJSON de
+    cada cidade a partir dos resultados (e, com `snapshot`, as diferenças em
+    relação à última raspagem; os removidos só são calculados para cidades
+    sem nenhuma unidade com falha).
+
+    O coordenador não acessa o site: os workers expandem cada cidade em
+    páginas de listagem (já divididas por grupos de bairros) e cada página em
+    perfis. Reiniciado sobre a mesma fila, continua de onde parou; para uma
+    nova raspagem sobre uma fila já usada, a fila deve ser limpa antes com
+    `WorkQueue.reset` (`--nova`).
+
+    Retorna os caminhos dos arquivos das cidades, na ordem de `cities`.
+    """
+    added = enqueue_cities(queue, cities)
+    logger.info(f"Coordenador: {added} cidade(s) enfileirada(s) de {len(cities)}. Aguardando os workers...")
+    if added < len(cities):
+        logger.warning(
+            f"{len(cities) - added} cidade(s) já estavam na fila e terão os resultados da raspagem anterior "
+            f"reaproveitados. Use --nova para começar uma nova raspagem."
+        )
+
+    last = None
+    while True:
+        queue.requeue_expired()
+        counts = queue.counts()
+        if counts != last:
+            logger.info(
+                f"Fila: {counts.get(PENDING, 0)} pendentes, {counts.get(LEASED, 0)} em andamento, "
+                f"{counts.get(DONE, 0)} concluídas, {counts.get(FAILED, 0)} com falha."
+            )
+            last = counts
+        if not counts.get(PENDING) and not counts.get(LEASED):
+            break
+        time.sleep(poll_interval)
+
+    if counts.get(FAILED):
+        logger.warning(f"{counts[FAILED]} unidades falharam após todas as tentativas e ficaram sem resultado.")
+
+    paths = []
+    for city in cities:
+        path = city_output_path(city)
+        sinks = [NDJSONSink(path)]
+        if parquet:
+            sinks.append(city_parquet_sink(city))
+        delta_sink = DeltaSink(city, snapshot) if snapshot else None
+        if delta_sink:
+            sinks.append(delta_sink)
+        sink = MultiSink(*sinks) if len(sinks) > 1 else sinks[0]
+        with sink:
+            sink.write_all(queue.results(city))
+            if delta_sink:
+                delta_sink.finish(complete=not queue.counts(city).get(FAILED))
+        logger.info(f"Raspagem da cidade: {city} concluída e {sink.count} registros salvos em {path}.")
+        paths.append(path)
+    return paths
+
+
+class _LeaseKeeper:
+    """Renova o aluguel de uma unidade em segundo plano enquanto ela é processada."""
+
+    def __init__(self, queue: WorkQueue, unit: WorkUnit, worker: str, seconds: float):
+        self.queue = queue
+        self.unit = unit
+        self.worker = worker
+        self.seconds = seconds
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.seconds / 3):
+            if not self.queue.extend(self.unit, self.worker, self.seconds):
+                logger.warning(f"Aluguel da unidade {self.unit.kind} {self.unit.key} perdido.")
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _process_unit(scraper: DoctorScraper, unit: WorkUnit) -> tuple:
+    """Processa uma unidade com a lógica do `DoctorScraper`. Retorna `(resultado, unidades filhas)`."""
+    if unit.kind == CITY_UNIT:
+        failures = scraper.failed_pages
+        targets = scraper.get_listing_targets()
+        if not targets:
+            raise RuntimeError("plano de listagens vazio")
+        if scraper.failed_pages != failures:
+            # Bairros sem cobertura: a unidade é refeita em vez de enfileirar um plano parcial
+            raise RuntimeError("plano de listagens incompleto")
+        children = [
+            WorkUnit(PAGE_UNIT, page_url(url, page), unit.city, {"base_url": unit.payload["base_url"], "district": label})
+            for url, last_page, label in targets
+            for page in range(1, last_page + 1)
+        ]
+        return {"targets": targets}, children
+
+    if unit.kind == PAGE_UNIT:
+        children = [
+            WorkUnit(PROFILE_UNIT, normalize_profile_url(row["link_to_profile"]), unit.city,
+                     {"base_url": unit.payload["base_url"], "district": unit.payload.get("district"), "row": row})
+            for row in scraper.get_listing_rows(unit.key)
+            if row["link_to_profile"]
+        ]
+        return {"profiles": len(children)}, children
+
+    if unit.kind == PROFILE_UNIT:
+        record = scraper.get_record(unit.payload["row"])
+        if record is None:
+            raise RuntimeError("detalhes do perfil não obtidos")
+        return record, []
+
+    raise ValueError(f"Tipo de unidade desconhecido: {unit.kind}")
+
+
+def run_worker(queue: WorkQueue, scraper_options: dict, worker: str = None, lease_seconds: float = LEASE_SECONDS,
+               idle_timeout: float = 60.0, poll_interval: float = POLL_INTERVAL) -> int:
+    """
+    Processa unidades da fila até ela ficar vazia (nenhuma unidade pendente
+    nem em andamento) ou até passar `idle_timeout` segundos sem trabalho.
+
+    `scraper_options` são repassadas aos scrapers (cache, limitador de taxa,
+    métricas etc.). Retorna o número de unidades concluídas.
+    """
+    worker = worker or default_worker_id()
+    # A fila já deduplica os perfis e guarda o progresso; a fronteira e o índice local não são usados
+    options = {**scraper_options, "frontier": None, "profile_index": None}
+    scrapers = {}
+    processed = 0
+    idle_since = None
+    logger.info(f"Worker {worker} iniciado.")
+    try:
+        while True:
+            unit = queue.lease(worker, lease_seconds)
+            if unit is None:
+                counts = queue.counts()
+                if counts and not counts.get(PENDING) and not counts.get(LEASED):
+                    break
+                idle_since = idle_since or time.monotonic()
+                if time.monotonic() - idle_since > idle_timeout:
+                    logger.info(f"Worker {worker}: sem trabalho há {idle_timeout:.0f}s, encerrando.")
+                    break
+                time.sleep(poll_interval)
+                continue
+            idle_since = None
+
+            key = (unit.city, unit.payload["base_url"])
+            if key not in scrapers:
+                scrapers[key] = DoctorScraper(base_url=unit.payload["base_url"], city=unit.city, **options)
+            try:
+                with _LeaseKeeper(queue, unit, worker, lease_seconds):
+                    result, children = _process_unit(scrapers[key], unit)
+            except Exception as e:
+                logger.error(f"Erro na unidade {unit.kind} {unit.key} (tentativa {unit.attempts}): {e}")
+                queue.fail(unit, worker, str(e))
+                continue
+            if queue.complete(unit, worker, result, children):
+                processed += 1
+            else:
+                logger.warning(f"Resultado da unidade {unit.kind} {unit.key} descartado: aluguel expirado.")
+    finally:
+        for scraper in scrapers.values():
+            scraper.close()
+
+    logger.info(f"Worker {worker} encerrado: {processed} unidades concluídas.")
+    return processed
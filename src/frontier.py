@@ -0,0 +1,123 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Iterator, Optional
+
+from utils.setup_logger import logger
+
+PENDING = "pending"
+IN_PROGRESS = "in_progress"
+DONE = "done"
+
+# Tipos de unidade de trabalho registradas na fronteira
+TARGETS_UNIT = "targets"
+PAGE_UNIT = "page"
+PROFILE_UNIT = "profile"
+
+
+class Frontier:
+    """
+    Fronteira persistente da raspagem, guardada em SQLite.
+
+    Registra, por cidade, o plano de listagens (grupos de bairros e número de
+    páginas), as páginas de listagem e os perfis, cada um como pendente, em
+    andamento ou concluído. Os perfis concluídos guardam o registro final do
+    médico, então uma execução reiniciada continua de onde parou sem buscar
+    de novo o que já foi feito.
+    """
+
+    def __init__(self, path: str = "data/frontier.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS units (
+                    city TEXT,
+                    kind TEXT,
+                    key TEXT,
+                    status TEXT,
+                    data TEXT,
+                    updated_at REAL,
+                    PRIMARY KEY (city, kind, key)
+                )
+            """)
+
+    def recover(self) -> int:
+        """Devolve para pendente as unidades que ficaram em andamento em uma execução interrompida."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE units SET status = ?, updated_at = ? WHERE status = ?",
+                (PENDING, time.time(), IN_PROGRESS),
+            )
+        if cursor.rowcount:
+            logger.info(f"Fronteira: {cursor.rowcount} unidades interrompidas voltaram para a fila.")
+        return cursor.rowcount
+
+    def status(self, city: str, kind: str, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status FROM units WHERE city = ? AND kind = ? AND key = ?", (city, kind, key)
+            ).fetchone()
+        return row[0] if row else None
+
+    def is_done(self, city: str, kind: str, key: str) -> bool:
+        return self.status(city, kind, key) == DONE
+
+    def get(self, city: str, kind: str, key: str):
+        """Retorna os dados guardados de uma unidade concluída."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM units WHERE city = ? AND kind = ? AND key = ? AND status = ?",
+                (city, kind, key, DONE),
+            ).fetchone()
+        return json.loads(row[0]) if row and row[0] is not None else None
+
+    def start(self, city: str, kind: str, key: str) -> None:
+        """Marca uma unidade como em andamento."""
+        self._set(city, kind, key, IN_PROGRESS, None)
+
+    def finish(self, city: str, kind: str, key: str, data=None) -> None:
+        """Marca uma unidade como concluída, guardando seu resultado."""
+        self._set(city, kind, key, DONE, json.dumps(data, ensure_ascii=False) if data is not None else None)
+
+    def _set(self, city: str, kind: str, key: str, status: str, data: Optional[str]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO units VALUES (?, ?, ?, ?, ?, ?)",
+                (city, kind, key, status, data, time.time()),
+            )
+
+    def records(self, city: str, batch_size: int = 500) -> Iterator[dict]:
+        """Percorre os registros dos perfis concluídos da cidade, na ordem em que foram concluídos."""
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT rowid, data FROM units WHERE city = ? AND kind = ? AND status = ? AND data IS NOT NULL "
+                    "AND rowid > ? ORDER BY rowid LIMIT ?",
+                    (city, PROFILE_UNIT, DONE, last_rowid, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            for last_rowid, data in rows:
+                yield json.loads(data)
+
+    def counts(self, city: str) -> dict:
+        """Conta as unidades da cidade por tipo e status."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kind, status, COUNT(*) FROM units WHERE city = ? GROUP BY kind, status", (city,)
+            ).fetchall()
+        counts = {}
+        for kind, status, total in rows:
+            counts.setdefault(kind, {})[status] = total
+        return counts
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,272 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+
+from utils.setup_logger import logger
+from utils.endpoints import LISTING, PROFILE, REVIEWS, QUESTIONS, ANSWER
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+# Tempo de validade padrão (em segundos) de cada tipo de endpoint
+DEFAULT_TTL = {
+    LISTING: 6 * HOUR,
+    PROFILE: DAY,
+    REVIEWS: DAY,
+    QUESTIONS: 7 * DAY,
+    ANSWER: 30 * DAY,
+}
+
+# Ao passar do limite, o cache é reduzido até esta fração dele, para não remover entradas a cada gravação
+EVICT_TARGET = 0.9
+# A cada quantas gravações o tamanho total é relido do banco (outros processos podem gravar no mesmo arquivo)
+SIZE_SYNC_INTERVAL = 1000
+
+# Extensão das respostas do cache com os bytes que vieram da rede (0 quando atendidas pelo cache)
+NETWORK_BYTES = "network_bytes"
+
+# Cabeçalhos que deixam de valer porque o corpo é guardado já descomprimido
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    status: int
+    headers: list
+    body: bytes
+    stored_at: float
+    ttl: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() - self.stored_at < self.ttl
+
+    @property
+    def validators(self) -> dict:
+        """Cabeçalhos de revalidação condicional suportados pela resposta guardada."""
+        headers = {name.lower(): value for name, value in self.headers}
+        conditional = {}
+        if "etag" in headers:
+            conditional["If-None-Match"] = headers["etag"]
+        if "last-modified" in headers:
+            conditional["If-Modified-Since"] = headers["last-modified"]
+        return conditional
+
+    def to_response(self, request: httpx.Request, cache_status: str, network_bytes: int = 0) -> httpx.Response:
+        return httpx.Response(
+            self.status,
+            headers=self.headers + [("X-Cache", cache_status)],
+            content=self.body,
+            request=request,
+            extensions={NETWORK_BYTES: network_bytes},
+        )
+
+
+class HttpCache:
+    """
+    Cache de respostas HTTP em disco, indexado pela URL.
+
+    Os corpos são guardados comprimidos em um banco SQLite, com validade
+    definida por tipo de endpoint. Respostas vencidas são revalidadas com
+    ETag/Last-Modified quando o servidor os envia, e as entradas menos usadas
+    são removidas quando o cache passa de `max_size` bytes. O tamanho total
+    é mantido em memória e atualizado a cada gravação, então o limite não
+    exige somar o banco inteiro a cada resposta guardada. No modo
+    `offline`, nenhuma requisição sai para a rede.
+    """
+
+    def __init__(self, path: str = "data/cache/http_cache.db", ttl: Optional[dict] = None,
+                 max_size: int = 2 * 1024 ** 3, offline: bool = False):
+        self.path = path
+        self.ttl = {**DEFAULT_TTL, **(ttl or {})}
+        self.max_size = max_size
+        self.offline = offline
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    url TEXT PRIMARY KEY,
+                    endpoint TEXT,
+                    status INTEGER,
+                    headers TEXT,
+                    body BLOB,
+                    size INTEGER,
+                    stored_at REAL,
+                    accessed_at REAL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+            self._size = self._total_size()
+        self._puts = 0
+
+    def get(self, url: str, endpoint: str) -> Optional[CacheEntry]:
+        """Busca a resposta guardada para a URL, atualizando o último acesso."""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT status, headers, body, stored_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url))
+
+        status, headers, body, stored_at = row
+        return CacheEntry(
+            url=url,
+            status=status,
+            headers=[tuple(header) for header in json.loads(headers)],
+            body=zlib.decompress(body),
+            stored_at=stored_at,
+            ttl=self.ttl.get(endpoint, DAY),
+        )
+
+    def put(self, url: str, endpoint: str, response: httpx.Response) -> None:
+        """Guarda uma resposta já lida e remove as entradas mais antigas se passar do limite."""
+        headers = [(name, value) for name, value in response.headers.multi_items() if name.lower() not in DROPPED_HEADERS]
+        body = zlib.compress(response.content)
+        now = time.time()
+        with self._lock, self._conn:
+            replaced = self._conn.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, endpoint, response.status_code, json.dumps(headers), body, len(body), now, now),
+            )
+            self._size += len(body) - (replaced[0] if replaced else 0)
+            self._puts += 1
+            if self._puts % SIZE_SYNC_INTERVAL == 0:
+                self._size = self._total_size()
+            if self._size > self.max_size:
+                self._evict()
+
+    def refresh(self, url: str) -> None:
+        """Renova a validade de uma entrada revalidada pelo servidor (304)."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE responses SET stored_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+
+    def _total_size(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _evict(self) -> None:
+        """Remove as entradas usadas há mais tempo até o cache ficar em `EVICT_TARGET` do limite."""
+        # Confere o total no banco antes de remover, já que outros processos podem ter gravado ou removido entradas
+        self._size = self._total_size()
+        target = self.max_size * EVICT_TARGET
+        removed = 0
+        while self._size > target:
+            rows = self._conn.execute("SELECT url, size FROM responses ORDER BY accessed_at LIMIT 500").fetchall()
+            if not rows:
+                break
+            for url, size in rows:
+                if self._size <= target:
+                    break
+                self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self._size -= size
+                removed += 1
+        logger.debug(f"Cache HTTP: {removed} entradas removidas por limite de tamanho.")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def lookup(self, request: httpx.Request):
+        """
+        Decide como atender a requisição a partir do cache.
+
+        Retorna `(entry, response)`: `response` já está pronta quando a entrada
+        está válida ou quando o modo offline está ativo; caso contrário a
+        requisição segue para a rede, com cabeçalhos condicionais se houver
+        uma entrada vencida.
+        """
+        endpoint = request.extensions.get("endpoint", PROFILE)
+        entry = self.get(str(request.url), endpoint)
+        if entry and entry.fresh:
+            return entry, entry.to_response(request, "HIT")
+        if self.offline:
+            if entry:
+                return entry, entry.to_response(request, "STALE")
+            return None, httpx.Response(504, headers={"X-Cache": "MISS"}, request=request)
+        if entry:
+            request.headers.update(entry.validators)
+        return entry, None
+
+    def handle_response(self, request: httpx.Request, entry: Optional[CacheEntry],
+                        response: httpx.Response) -> httpx.Response:
+        """
+        Trata a resposta vinda da rede, já lida: revalidação (304) ou
+        armazenamento. A resposta devolvida leva em `NETWORK_BYTES` os bytes
+        baixados da rede, já que o corpo dela é montado de novo (descomprimido).
+        """
+        url = str(request.url)
+        if response.status_code == 304 and entry:
+            self.refresh(url)
+            return entry.to_response(request, "REVALIDATED", response.num_bytes_downloaded)
+        if response.status_code == 200:
+            self.put(url, request.extensions.get("endpoint", PROFILE), response)
+        return httpx.Response(
+            response.status_code,
+            headers=[(name, value) for name, value in response.headers.multi_items() if name.lower() not in DROPPED_HEADERS]
+            + [("X-Cache", "MISS")],
+            content=response.content,
+            request=request,
+            extensions={NETWORK_BYTES: response.num_bytes_downloaded},
+        )
+
+
+class CacheTransport(httpx.BaseTransport):
+    """Transporte síncrono do httpx que passa as requisições GET pelo `HttpCache`."""
+
+    def __init__(self, cache: HttpCache, transport: Optional[httpx.BaseTransport] = None):
+        self.cache = cache
+        self.transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "GET":
+            return self.transport.handle_request(request)
+        entry, cached = self.cache.lookup(request)
+        if cached is not None:
+            return cached
+        response = self.transport.handle_request(request)
+        try:
+            response.read()
+        finally:
+            response.close()
+        return self.cache.handle_response(request, entry, response)
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncCacheTransport(httpx.AsyncBaseTransport):
+    """Transporte assíncrono do httpx que passa as requisições GET pelo `HttpCache`."""
+
+    def __init__(self, cache: HttpCache, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.cache = cache
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "GET":
+            return await self.transport.handle_async_request(request)
+        entry, cached = self.cache.lookup(request)
+        if cached is not None:
+            return cached
+        response = await self.transport.handle_async_request(request)
+        try:
+            await response.aread()
+        finally:
+            await response.aclose()
+        return self.cache.handle_response(request, entry, response)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
@@ -0,0 +1,132 @@
+import threading
+
+import httpx
+
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+from src.http_cache import AsyncCacheTransport, CacheTransport, HttpCache
+from src.metrics import Metrics
+from src.rate_limit import AsyncRateLimitTransport, RateLimiter, RateLimitTransport
+from utils.setup_logger import logger
+from utils.endpoints import LISTING, PROFILE, REVIEWS, QUESTIONS, ANSWER
+
+# Tempos máximos (em segundos) para conectar e para ler a resposta, por tipo de endpoint
+DEFAULT_TIMEOUTS = {
+    LISTING: (5.0, 20.0),
+    PROFILE: (5.0, 15.0),
+    REVIEWS: (5.0, 10.0),
+    QUESTIONS: (5.0, 15.0),
+    ANSWER: (5.0, 10.0),
+}
+# Tempo máximo de espera por uma conexão livre no pool
+POOL_TIMEOUT = 30.0
+
+MAX_CONNECTIONS = 20
+KEEPALIVE_EXPIRY = 30.0
+
+
+def http2_available() -> bool:
+    """Indica se o pacote h2 (HTTP/2 no httpx) está instalado."""
+    return h2 is not None
+
+
+def accept_encoding() -> str:
+    """Compressões aceitas nas respostas: brotli quando há decodificador instalado, gzip e deflate sempre."""
+    return "br, gzip, deflate" if brotli is not None else "gzip, deflate"
+
+
+def endpoint_timeouts(connect: float = None, read: float = None) -> dict:
+    """Tempos por endpoint, trocando os de conexão e/ou leitura de todos os endpoints quando informados."""
+    return {
+        endpoint: (connect or default_connect, read or default_read)
+        for endpoint, (default_connect, default_read) in DEFAULT_TIMEOUTS.items()
+    }
+
+
+class HttpClients:
+    """
+    Clientes HTTP de uma execução, todos com as mesmas configurações: pool de
+    conexões com keep-alive, HTTP/2 opcional, compressão negociada e tempos
+    de conexão e leitura por tipo de endpoint. As requisições passam pelo
+    limitador de taxa e, quando configurado, pelo cache, que fica na frente
+    do limitador (respostas em cache não consomem a taxa).
+
+    O cliente síncrono (`client`) é criado uma única vez e compartilhado por
+    todos os scrapers e threads do processo, então as conexões com o site são
+    reaproveitadas de uma página, perfil ou cidade para outra. Clientes
+    assíncronos ficam presos ao event loop em que foram criados: cada
+    `AsyncDoctorScraper` cria o seu com `async_client()` e o fecha ao final.
+    """
+
+    def __init__(self, limiter: RateLimiter = None, metrics: Metrics = None, cache: HttpCache = None,
+                 max_connections: int = MAX_CONNECTIONS, keepalive_expiry: float = KEEPALIVE_EXPIRY,
+                 http2: bool = False, timeouts: dict = None):
+        self.limiter = limiter or RateLimiter()
+        self.metrics = metrics
+        self.cache = cache
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        if http2 and not http2_available():
+            logger.warning("HTTP/2 requer o pacote h2 (pip install h2); usando HTTP/1.1.")
+            http2 = False
+        self.http2 = http2
+        self.timeouts = {
+            endpoint: httpx.Timeout(read, connect=connect, pool=POOL_TIMEOUT)
+            for endpoint, (connect, read) in (timeouts or DEFAULT_TIMEOUTS).items()
+        }
+        self.headers = {"Accept-Encoding": accept_encoding()}
+        self._client = None
+        self._lock = threading.Lock()
+
+    def timeout(self, endpoint: str) -> httpx.Timeout:
+        """Tempos de conexão, leitura e espera pelo pool do tipo de endpoint."""
+        return self.timeouts.get(endpoint) or self.timeouts[PROFILE]
+
+    @property
+    def client(self) -> httpx.Client:
+        """Cliente síncrono compartilhado, criado no primeiro uso."""
+        with self._lock:
+            if self._client is None:
+                transport = RateLimitTransport(
+                    self.limiter, httpx.HTTPTransport(limits=self.limits, http2=self.http2), metrics=self.metrics
+                )
+                if self.cache:
+                    transport = CacheTransport(self.cache, transport)
+                self._client = httpx.Client(transport=transport, headers=self.headers, timeout=self.timeout(PROFILE))
+            return self._client
+
+    def async_client(self) -> httpx.AsyncClient:
+        """Cria um cliente assíncrono com as mesmas configurações; quem cria é responsável por fechá-lo."""
+        transport = AsyncRateLimitTransport(
+            self.limiter, httpx.AsyncHTTPTransport(limits=self.limits, http2=self.http2), metrics=self.metrics
+        )
+        if self.cache:
+            transport = AsyncCacheTransport(self.cache, transport)
+        return httpx.AsyncClient(transport=transport, headers=self.headers, timeout=self.timeout(PROFILE))
+
+    def close(self) -> None:
+        """Fecha o cliente síncrono e as conexões abertas dele."""
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
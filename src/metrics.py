@@ -0,0 +1,266 @@
+import os
+import json
+import time
+import bisect
+import threading
+import contextlib
+from typing import Optional
+
+from utils.setup_logger import logger
+from utils.endpoints import ENDPOINTS
+
+# Limites (em segundos) dos buckets dos histogramas
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PARSE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# Contadores por endpoint, na ordem em que aparecem no snapshot
+ENDPOINT_COUNTERS = ("requests", "errors", "retries", "bytes", "cache_hits")
+
+PROMETHEUS_PREFIX = "doctoralia"
+
+
+class Histogram:
+    """Histograma com buckets fixos, no formato cumulativo do Prometheus."""
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def to_dict(self) -> dict:
+        cumulative, buckets = 0, {}
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {"count": self.count, "sum": round(self.sum, 6), "buckets": buckets}
+
+    def merge(self, data: dict) -> None:
+        """Soma ao histograma um outro histograma exportado por `to_dict`."""
+        previous = 0
+        for i, cumulative in enumerate(data["buckets"].values()):
+            self.counts[i] += cumulative - previous
+            previous = cumulative
+        self.count += data["count"]
+        self.sum += data["sum"]
+
+
+class Metrics:
+    """
+    Métricas da raspagem por tipo de endpoint (listagem, perfil, reviews,
+    perguntas e resposta completa): latência das requisições, bytes
+    baixados da rede, tempo de parsing/extração, novas tentativas e erros.
+
+    É compartilhada por todas as threads e tarefas de um processo. Com
+    `--workers`, cada processo tem a sua e os snapshots são somados no
+    processo principal com `merge`.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._endpoints = {endpoint: self._new_endpoint() for endpoint in ENDPOINTS}
+        self._counters = {}
+
+    @staticmethod
+    def _new_endpoint() -> dict:
+        data = {name: 0 for name in ENDPOINT_COUNTERS}
+        data["latency"] = Histogram(LATENCY_BUCKETS)
+        data["parse"] = Histogram(PARSE_BUCKETS)
+        return data
+
+    def _endpoint(self, endpoint: str) -> dict:
+        if endpoint not in self._endpoints:
+            self._endpoints[endpoint] = self._new_endpoint()
+        return self._endpoints[endpoint]
+
+    def observe_request(self, endpoint: str, seconds: float, size: int = 0, error: bool = False,
+                        cache_hit: bool = False) -> None:
+        """Registra uma requisição concluída (já com as novas tentativas)."""
+        with self._lock:
+            data = self._endpoint(endpoint)
+            data["requests"] += 1
+            data["bytes"] += size
+            data["errors"] += int(error)
+            data["cache_hits"] += int(cache_hit)
+            data["latency"].observe(seconds)
+
+    def observe_parse(self, endpoint: str, seconds: float) -> None:
+        with self._lock:
+            self._endpoint(endpoint)["parse"].observe(seconds)
+
+    def record_retry(self, endpoint: str) -> None:
+        with self._lock:
+            self._endpoint(endpoint)["retries"] += 1
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """Incrementa um contador geral da execução (ex.: `doctors`)."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    @contextlib.contextmanager
+    def timed_parse(self, endpoint: str):
+        """Mede o tempo de parsing e extração de uma resposta do endpoint."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_parse(endpoint, time.perf_counter() - start)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "started_at": self.started_at,
+                "elapsed_seconds": round(time.time() - self.started_at, 3),
+                "counters": dict(self._counters),
+                "endpoints": {
+                    endpoint: {
+                        **{name: data[name] for name in ENDPOINT_COUNTERS},
+                        "latency": data["latency"].to_dict(),
+                        "parse": data["parse"].to_dict(),
+                    }
+                    for endpoint, data in self._endpoints.items()
+                },
+            }
+
+    def merge(self, snapshot: dict) -> None:
+        """Soma às métricas um snapshot gerado em outro processo."""
+        with self._lock:
+            for name, value in snapshot["counters"].items():
+                self._counters[name] = self._counters.get(name, 0) + value
+            for endpoint, values in snapshot["endpoints"].items():
+                data = self._endpoint(endpoint)
+                for name in ENDPOINT_COUNTERS:
+                    data[name] += values[name]
+                data["latency"].merge(values["latency"])
+                data["parse"].merge(values["parse"])
+
+    def to_prometheus(self) -> str:
+        """Snapshot no formato texto de exposição do Prometheus."""
+        snapshot = self.snapshot()
+        endpoints = snapshot["endpoints"]
+        lines = []
+
+        def header(name, kind, description):
+            lines.append(f"# HELP {PROMETHEUS_PREFIX}_{name} {description}")
+            lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{name} {kind}")
+
+        counters = {
+            "requests": ("requests_total", "Requisições concluídas por endpoint."),
+            "errors": ("request_errors_total", "Requisições que terminaram em erro por endpoint."),
+            "retries": ("request_retries_total", "Novas tentativas de requisição por endpoint."),
+            "bytes": ("response_bytes_total", "Bytes baixados da rede por endpoint (comprimidos, sem as respostas do cache)."),
+            "cache_hits": ("cache_hits_total", "Respostas atendidas pelo cache por endpoint."),
+        }
+        for key, (name, description) in counters.items():
+            header(name, "counter", description)
+            for endpoint, data in endpoints.items():
+                lines.append(f'{PROMETHEUS_PREFIX}_{name}{{endpoint="{endpoint}"}} {data[key]}')
+
+        histograms = {
+            "latency": ("request_latency_seconds", "Latência das requisições por endpoint."),
+            "parse": ("parse_seconds", "Tempo de parsing e extração por endpoint."),
+        }
+        for key, (name, description) in histograms.items():
+            header(name, "histogram", description)
+            for endpoint, data in endpoints.items():
+                histogram = data[key]
+                for bound, count in histogram["buckets"].items():
+                    lines.append(f'{PROMETHEUS_PREFIX}_{name}_bucket{{endpoint="{endpoint}",le="{bound}"}} {count}')
+                lines.append(f'{PROMETHEUS_PREFIX}_{name}_sum{{endpoint="{endpoint}"}} {histogram["sum"]}')
+                lines.append(f'{PROMETHEUS_PREFIX}_{name}_count{{endpoint="{endpoint}"}} {histogram["count"]}')
+
+        for name, value in sorted(snapshot["counters"].items()):
+            header(f"{name}_total", "counter", f"Total de {name} na execução.")
+            lines.append(f"{PROMETHEUS_PREFIX}_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """
+        Grava o snapshot em `path`: texto do Prometheus quando a extensão é
+        `.prom`, JSON nos demais casos. A gravação é atômica, para que um
+        coletor nunca leia um arquivo pela metade.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        content = self.to_prometheus() if path.endswith(".prom") else json.dumps(self.snapshot(), indent=2)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(content)
+        os.replace(tmp_path, path)
+
+
+class MetricsExporter:
+    """Grava o snapshot das métricas a cada `interval` segundos e uma última vez em `stop()`."""
+
+    def __init__(self, metrics: Metrics, path: str, interval: float = 30.0):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+
+    def start(self) -> "MetricsExporter":
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._export()
+
+    def _export(self) -> None:
+        try:
+            self.metrics.write(self.path)
+        except Exception as e:
+            logger.warning(f"Erro ao gravar as métricas em {self.path}: {e}")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._export()
+        logger.info(f"Métricas salvas em {self.path}.")
+
+
+@contextlib.contextmanager
+def profile_run(kind: Optional[str], path: str):
+    """
+    Executa o bloco sob um profiler: `cprofile` grava as estatísticas do
+    cProfile em `path` (para `pstats`/snakeviz) e `pyinstrument` grava um
+    relatório HTML. Com `kind` vazio, não faz nada.
+    """
+    if not kind:
+        yield
+        return
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if kind == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            logger.error("pyinstrument não está instalado; use `pip install pyinstrument` ou --perfil cprofile.")
+            yield
+            return
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(profiler.output_html())
+            logger.info(f"Perfil de execução (pyinstrument) salvo em {path}.")
+    else:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path)
+            logger.info(f"Perfil de execução (cProfile) salvo em {path}.")
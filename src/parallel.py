@@ -0,0 +1,132 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from src.scraper import DoctorScraper
+from src.pipeline import (
+    build_scraper_options,
+    close_scraper_options,
+    merge_parts,
+    part_output_path,
+    scrape_to_file,
+)
+from src.scheduler import ProgressTracker, log_plan, plan_cost
+from utils.setup_logger import logger, setup_worker_logger, start_log_listener
+
+
+def _plan_city(city: str, url: str, config: dict) -> tuple:
+    """
+    Monta, em um worker, o plano de listagens de uma cidade. Retorna
+    `(plano, completo, métricas)`; o plano é incompleto quando alguma
+    consulta do número de páginas falhou.
+    """
+    options = build_scraper_options(config)
+    scraper = DoctorScraper(base_url=url, city=city, **options)
+    try:
+        targets = scraper.get_listing_targets()
+        return targets, scraper.complete, options["metrics"].snapshot()
+    except Exception as e:
+        logger.error(f"Erro ao planejar a cidade {city}: {e}")
+        return [], False, options["metrics"].snapshot()
+    finally:
+        scraper.close()
+        close_scraper_options(options)
+
+
+def _run_unit(unit: dict, config: dict) -> tuple:
+    """
+    Raspa, em um worker, uma unidade de trabalho e grava o resultado no
+    arquivo da unidade. Retorna `(registros, completa, métricas)`.
+    """
+    options = build_scraper_options(config)
+    try:
+        count, complete = scrape_to_file(
+            unit["city"], unit["url"], unit["path"],
+            config.get("assincrono", False), config.get("concorrencia", 10),
+            targets=unit["targets"], **options,
+        )
+        logger.info(f"Parte {unit['label']} de {unit['city']} concluída: {count} registros em {unit['path']}.")
+        return count, complete, options["metrics"].snapshot()
+    finally:
+        close_scraper_options(options)
+
+
+def run_parallel(cities: dict, config: dict, workers: int, scraper_options: dict) -> list:
+    """
+    Raspa as cidades em um pool de processos.
+
+    Primeiro cada cidade é planejada em paralelo; em seguida cada listagem do
+    plano (a cidade inteira ou um grupo de bairros, nas cidades grandes) vira
+    uma unidade de trabalho com o seu próprio arquivo. As unidades são
+    enviadas ao pool da maior para a menor (em páginas), para que as longas
+    comecem cedo e as pequenas preencham os processos livres no final. Quando
+    todas as unidades de uma cidade terminam, o processo principal junta as
+    partes no arquivo da cidade; as remoções do modo incremental só são
+    calculadas se o plano e todas as unidades da cidade terminaram sem
+    falhas. Os logs dos workers passam por uma fila e são escritos somente
+    pelo processo principal, e as métricas de cada worker são somadas às de
+    `scraper_options["metrics"]`.
+
+    Retorna os caminhos dos arquivos das cidades, na ordem de `cities`.
+    """
+    log_queue, listener = start_log_listener()
+    paths = {}
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=setup_worker_logger, initargs=(log_queue,)) as executor:
+            plans = {executor.submit(_plan_city, city, url, config): city for city, url in cities.items()}
+            units = []
+            parts = {}
+            remaining = {}
+            complete = {}
+            costs = {}
+            for future in as_completed(plans):
+                city = plans[future]
+                targets, plan_complete, snapshot = future.result()
+                scraper_options["metrics"].merge(snapshot)
+                parts[city] = [part_output_path(city, part) for part in range(len(targets))]
+                remaining[city] = len(targets)
+                complete[city] = plan_complete and bool(targets)
+                costs[city] = plan_cost(targets)
+                logger.info(f"{city}: {len(targets)} unidade(s) de trabalho.")
+                if not targets:
+                    paths[city] = merge_parts(
+                        city, [], scraper_options.get("frontier"), config.get("parquet", False),
+                        scraper_options.get("snapshot"), complete=False,
+                    )
+                for part, target in enumerate(targets):
+                    units.append({
+                        "city": city,
+                        "url": cities[city],
+                        "targets": [target],
+                        "label": f"{part + 1}/{len(targets)}",
+                        "path": parts[city][part],
+                        "cost": target[1],
+                    })
+
+            log_plan(costs)
+            progress = ProgressTracker(sum(costs.values()))
+            # O pool executa as unidades na ordem de envio
+            futures = {
+                executor.submit(_run_unit, unit, config): unit
+                for unit in sorted(units, key=lambda unit: unit["cost"], reverse=True)
+            }
+            for future in as_completed(futures):
+                unit = futures[future]
+                city = unit["city"]
+                try:
+                    _, unit_complete, snapshot = future.result()
+                    scraper_options["metrics"].merge(snapshot)
+                    complete[city] = complete[city] and unit_complete
+                except Exception as e:
+                    complete[city] = False
+                    logger.error(f"Erro em uma unidade de trabalho de {city}: {e}")
+                progress.advance(unit["cost"])
+                remaining[city] -= 1
+                if remaining[city] == 0:
+                    paths[city] = merge_parts(
+                        city, parts[city], scraper_options.get("frontier"), config.get("parquet", False),
+                        scraper_options.get("snapshot"), complete=complete[city],
+                    )
+                    logger.info(f"Raspagem da cidade: {city} concluída e dados salvos em {paths[city]}.")
+    finally:
+        listener.stop()
+
+    return [paths[city] for city in cities if city in paths]
@@ -0,0 +1,203 @@
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+from src.dedup import normalize_profile_url
+
+PARQUET_DIR = "data/parquet"
+ROW_GROUP_SIZE = 10_000
+
+if pa is not None:
+    # Tabelas normalizadas, ligadas pela coluna `doctor_key` (URL normalizada do perfil)
+    SCHEMAS = {
+        "doctors": pa.schema([
+            ("doctor_key", pa.string()),
+            ("city", pa.string()),
+            ("professional", pa.string()),
+            ("specialties", pa.list_(pa.string())),
+            ("register_id", pa.string()),
+            ("reviews", pa.int32()),
+            ("link_to_profile", pa.string()),
+            ("name", pa.string()),
+            ("about", pa.string()),
+            ("experience", pa.string()),
+            ("insurance_cover", pa.string()),
+            ("age_public_range", pa.string()),
+        ]),
+        "reviews": pa.schema([
+            ("doctor_key", pa.string()),
+            ("position", pa.int32()),
+            ("reviewer_name", pa.string()),
+            ("review_date", pa.string()),
+            ("review_comment", pa.string()),
+        ]),
+        "services": pa.schema([
+            ("doctor_key", pa.string()),
+            ("service_name", pa.string()),
+            ("price", pa.int32()),
+        ]),
+        "questions": pa.schema([
+            ("doctor_key", pa.string()),
+            ("position", pa.int32()),
+            ("question_title", pa.string()),
+            ("question_category", pa.string()),
+            ("full_question", pa.string()),
+            ("answer_date", pa.string()),
+            ("answer_text", pa.string()),
+        ]),
+        "social_links": pa.schema([
+            ("doctor_key", pa.string()),
+            ("social_network", pa.string()),
+            ("url", pa.string()),
+        ]),
+    }
+
+
+def parquet_available() -> bool:
+    """Indica se o pyarrow está instalado."""
+    return pa is not None
+
+
+def normalize_record(record: dict) -> dict:
+    """
+    Separa um registro de médico (formato de `DoctorScraper.scrape`) nas
+    linhas de cada tabela normalizada.
+    """
+    key = normalize_profile_url(record["link_to_profile"]) if record.get("link_to_profile") else None
+    data = record.get("data") or {}
+    return {
+        "doctors": [{
+            "doctor_key": key,
+            "city": record.get("city"),
+            "professional": record.get("professional"),
+            "specialties": record.get("specialties") or [],
+            "register_id": record.get("register_id"),
+            "reviews": record.get("reviews"),
+            "link_to_profile": record.get("link_to_profile"),
+            "name": data.get("Name"),
+            "about": data.get("About"),
+            "experience": data.get("Experience"),
+            "insurance_cover": data.get("Insurance Cover"),
+            "age_public_range": data.get("AgePublic Range"),
+        }],
+        "reviews": [
+            {
+                "doctor_key": key,
+                "position": i,
+                "reviewer_name": review.get("Reviewer Name"),
+                "review_date": review.get("Review Date"),
+                "review_comment": review.get("Review Comment"),
+            }
+            for i, review in enumerate(data.get("Patient Reviews") or [])
+        ],
+        "services": [
+            {"doctor_key": key, "service_name": service.get("Service Name"), "price": service.get("Price")}
+            for service in data.get("Medical Services") or []
+        ],
+        "questions": [
+            {
+                "doctor_key": key,
+                "position": i,
+                "question_title": question.get("Question Title"),
+                "question_category": question.get("Question Category"),
+                "full_question": question.get("Full Question"),
+                "answer_date": question.get("Answer Date"),
+                "answer_text": question.get("Answer Text"),
+            }
+            for i, question in enumerate(data.get("Health Questions and Answers") or [])
+        ],
+        "social_links": [
+            {"doctor_key": key, "social_network": link.get("Social Network"), "url": link.get("URL")}
+            for link in data.get("Social Links") or []
+        ],
+    }
+
+
+class ParquetSink:
+    """
+    Grava os registros em tabelas Parquet normalizadas (médicos, reviews,
+    serviços, perguntas e redes sociais), uma pasta por tabela:
+    `<directory>/<tabela>/<name>.parquet`.
+
+    As linhas ficam em buffer só até completar `row_group_size` linhas em uma
+    tabela, quando viram um row group no arquivo, então a memória não cresce
+    com o tamanho da cidade. Cada pasta pode ser lida como um único dataset
+    (ex.: `pyarrow.parquet.read_table("data/parquet/reviews", columns=[...])`).
+
+    Tem a mesma interface de `NDJSONSink`.
+    """
+
+    def __init__(self, name: str, directory: str = PARQUET_DIR, row_group_size: int = ROW_GROUP_SIZE):
+        if pa is None:
+            raise RuntimeError("A exportação em Parquet requer o pyarrow: pip install pyarrow")
+        self.name = name
+        self.directory = directory
+        self.row_group_size = row_group_size
+        self.count = 0
+        self._buffers = {table: [] for table in SCHEMAS}
+        self._writers = {}
+        self._closed = False
+
+    def path(self, table: str) -> str:
+        return os.path.join(self.directory, table, f"{self.name}.parquet")
+
+    def _tmp_path(self, table: str) -> str:
+        # Arquivos começados com "_" são ignorados ao ler a pasta como dataset
+        return os.path.join(self.directory, table, f"_{self.name}.parquet.tmp")
+
+    def write(self, record: dict) -> None:
+        for table, rows in normalize_record(record).items():
+            buffer = self._buffers[table]
+            buffer.extend(rows)
+            while len(buffer) >= self.row_group_size:
+                self._write_rows(table, buffer[:self.row_group_size])
+                del buffer[:self.row_group_size]
+        self.count += 1
+
+    def write_all(self, records) -> int:
+        """Grava todos os registros do iterável, retornando quantos foram gravados."""
+        start = self.count
+        for record in records:
+            self.write(record)
+        return self.count - start
+
+    def _writer(self, table: str):
+        if table not in self._writers:
+            path = self._tmp_path(table)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._writers[table] = pq.ParquetWriter(path, SCHEMAS[table], compression="zstd")
+        return self._writers[table]
+
+    def _write_rows(self, table: str, rows: list) -> None:
+        batch = pa.Table.from_pylist(rows, schema=SCHEMAS[table])
+        self._writer(table).write_table(batch, row_group_size=self.row_group_size)
+
+    def _flush_table(self, table: str) -> None:
+        rows, self._buffers[table] = self._buffers[table], []
+        if rows:
+            self._write_rows(table, rows)
+
+    def flush(self) -> None:
+        for table in SCHEMAS:
+            self._flush_table(table)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        # Tabelas sem nenhuma linha também ganham arquivo, para que o dataset tenha todas as cidades.
+        # O arquivo só aparece no caminho final depois de completo
+        for table in SCHEMAS:
+            self._writer(table).close()
+            os.replace(self._tmp_path(table), self.path(table))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
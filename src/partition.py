@@ -0,0 +1,168 @@
+from typing import Optional
+
+from utils.setup_logger import logger
+
+# Máximo de bairros por grupo, para manter a URL filtrada em um tamanho razoável
+MAX_DISTRICTS_PER_BATCH = 100
+# Vezes que um grupo é consultado antes de ficar sem cobertura, quando a consulta falha
+MAX_PROBE_ATTEMPTS = 3
+
+
+class DistrictPartitioner:
+    """
+    Divide os bairros de uma cidade em grupos cuja listagem caiba no limite
+    de páginas do site, usando o menor número possível de páginas.
+
+    O particionador não faz requisições: quem o usa pede os grupos a consultar
+    com `next_probes()`, obtém o número de páginas de cada um (ex.: com
+    `get_last_page`) e devolve com `feed()`, até `next_probes()` voltar vazio.
+    Isso permite consultar os grupos em sequência ou em paralelo.
+
+    Funciona em duas fases:
+    1. Divisão: grupos acima do limite são divididos ao meio, recursivamente.
+       Um bairro sozinho acima do limite não pode ser dividido e é registrado
+       como truncado.
+    2. Junção: grupos pequenos são combinados (first-fit decreasing) enquanto a
+       soma das páginas couber no limite, e cada combinação é consultada de
+       novo para obter o número real de páginas.
+
+    Uma consulta que falhou é informada com `None` no lugar das páginas. Na
+    divisão, o grupo é consultado de novo na rodada seguinte, até
+    `MAX_PROBE_ATTEMPTS` vezes; depois é dividido ao meio ou, se for um único
+    bairro, fica sem cobertura (`failed`). Na junção, a combinação é
+    descartada e os grupos originais são mantidos.
+    Um plano com grupos sem cobertura não está completo (`complete`).
+    """
+
+    def __init__(self, districts: list, max_pages: int, total_pages: int = None,
+                 max_districts: int = MAX_DISTRICTS_PER_BATCH):
+        self.max_pages = max_pages
+        self.max_districts = max_districts
+        self.districts = list(districts)
+        self.probes = 0
+        self.accepted = []
+        self.truncated = []
+        self.failed = []
+        self._attempts = {}
+        self._phase = "split"
+        self._candidates = {}
+
+        if total_pages is not None and total_pages > max_pages:
+            # A cidade inteira já foi consultada e passa do limite
+            self._pending = self._split(self.districts)
+        else:
+            self._pending = [self.districts] if self.districts else []
+
+    @staticmethod
+    def _key(batch: list) -> tuple:
+        return tuple(district["key"] for district in batch)
+
+    def _split(self, batch: list) -> list:
+        middle = len(batch) // 2
+        return [batch[:middle], batch[middle:]]
+
+    def next_probes(self) -> list:
+        """Retorna os grupos de bairros que precisam ter o número de páginas consultado."""
+        if not self._pending and self._phase == "split":
+            self._phase = "merge"
+            self._pending = self._merge_candidates()
+        probes, self._pending = self._pending, []
+        return probes
+
+    def feed(self, batch: list, pages: Optional[int]) -> None:
+        """
+        Informa o número de páginas de um grupo retornado por `next_probes()`,
+        ou `None` se a consulta falhou.
+        """
+        self.probes += 1
+        if self._phase == "merge":
+            group = self._candidates.pop(self._key(batch))
+            if pages is not None and pages <= self.max_pages:
+                for entry in group:
+                    self.accepted.remove(entry)
+                self.accepted.append((batch, pages))
+            return
+
+        if pages is None:
+            key = self._key(batch)
+            self._attempts[key] = self._attempts.get(key, 0) + 1
+            if self._attempts[key] < MAX_PROBE_ATTEMPTS:
+                self._pending.append(batch)
+            elif len(batch) > 1:
+                # A falha pode ser da URL do grupo (ex.: longa demais); as metades são consultadas separadamente
+                self._pending.extend(self._split(batch))
+            else:
+                self.failed.append(batch)
+        elif pages <= self.max_pages and len(batch) <= self.max_districts:
+            self.accepted.append((batch, pages))
+        elif len(batch) == 1:
+            self.truncated.append((batch, pages))
+            self.accepted.append((batch, self.max_pages))
+        else:
+            self._pending.extend(self._split(batch))
+
+    def _merge_candidates(self) -> list:
+        """Combina os grupos aceitos em candidatos que, somados, caibam no limite."""
+        bins = []
+        for entry in sorted(self.accepted, key=lambda entry: entry[1], reverse=True):
+            batch, pages = entry
+            for group in bins:
+                if (group["pages"] + pages <= self.max_pages
+                        and group["districts"] + len(batch) <= self.max_districts):
+                    group["entries"].append(entry)
+                    group["pages"] += pages
+                    group["districts"] += len(batch)
+                    break
+            else:
+                bins.append({"entries": [entry], "pages": pages, "districts": len(batch)})
+
+        probes = []
+        for group in bins:
+            if len(group["entries"]) < 2:
+                continue
+            batch = [district for entry_batch, _ in group["entries"] for district in entry_batch]
+            self._candidates[self._key(batch)] = group["entries"]
+            probes.append(batch)
+        return probes
+
+    @property
+    def complete(self) -> bool:
+        """Indica se todos os bairros ficaram em algum grupo (nenhuma consulta falhou de vez)."""
+        return not self.failed
+
+    def plan(self) -> list:
+        """Retorna os grupos finais como lista de `(bairros, páginas)`."""
+        return list(self.accepted)
+
+    def report(self) -> dict:
+        """Resumo da partição: cobertura e número de requisições."""
+        covered = sum(len(batch) for batch, _ in self.accepted)
+        return {
+            "districts": len(self.districts),
+            "covered": covered,
+            "batches": len(self.accepted),
+            "listing_pages": sum(pages for _, pages in self.accepted),
+            "probes": self.probes,
+            "truncated_districts": [batch[0]["name"] for batch, _ in self.truncated],
+            "uncovered_pages": sum(pages - self.max_pages for _, pages in self.truncated),
+            "failed_districts": [district["name"] for batch in self.failed for district in batch],
+        }
+
+    def log_report(self, city: str) -> dict:
+        report = self.report()
+        logger.info(
+            f"Partição de {city}: {report['covered']}/{report['districts']} bairros em {report['batches']} grupos, "
+            f"{report['listing_pages']} páginas de listagem, {report['probes']} consultas de contagem."
+        )
+        if report["truncated_districts"]:
+            logger.warning(
+                f"{len(report['truncated_districts'])} bairro(s) de {city} passam sozinhos do limite de "
+                f"{self.max_pages} páginas ({report['uncovered_pages']} páginas sem cobertura): "
+                f"{', '.join(report['truncated_districts'])}"
+            )
+        if report["failed_districts"]:
+            logger.error(
+                f"{len(report['failed_districts'])} bairro(s) de {city} ficaram sem cobertura porque a consulta "
+                f"do número de páginas falhou: {', '.join(report['failed_districts'])}"
+            )
+        return report
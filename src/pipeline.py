@@ -0,0 +1,204 @@
+import os
+import asyncio
+
+from src.scraper import DoctorScraper
+from src.async_scraper import AsyncDoctorScraper
+from src.dedup import AnswerCache, ProfileIndex
+from src.frontier import Frontier
+from src.http_cache import HttpCache
+from src.http_client import KEEPALIVE_EXPIRY, MAX_CONNECTIONS, HttpClients, endpoint_timeouts
+from src.metrics import Metrics
+from src.rate_limit import RateLimiter
+from src.parquet_sink import ParquetSink
+from src.scheduler import log_plan, plan_cost
+from src.sink import MultiSink, NDJSONSink, append_file, iter_ndjson
+from src.snapshot import DeltaSink, SnapshotIndex
+from utils.setup_logger import logger
+
+CONSOLIDATED_PATH = "data/doctolaria.ndjson"
+PARTS_DIR = "data/parts"
+ASSOCIATIONS_PATH = "data/profile_associations.ndjson"
+
+
+def city_output_path(city: str) -> str:
+    """Caminho do arquivo NDJSON de uma cidade."""
+    return f"data/{city.replace(' ', '_')}.ndjson"
+
+
+def city_parquet_sink(city: str) -> ParquetSink:
+    """Sink das tabelas Parquet de uma cidade (`data/parquet/<tabela>/<cidade>.parquet`)."""
+    return ParquetSink(city.replace(' ', '_'))
+
+
+def part_output_path(city: str, part: int) -> str:
+    """Caminho do arquivo NDJSON de uma parte de uma cidade, gravado por um worker."""
+    return os.path.join(PARTS_DIR, f"{city.replace(' ', '_')}.{part}.ndjson")
+
+
+def build_scraper_options(config: dict) -> dict:
+    """
+    Cria os componentes repassados aos scrapers a partir da configuração da execução.
+
+    A configuração é um dicionário simples (serializável), para que cada
+    processo possa montar os seus próprios componentes.
+    """
+    cache = None
+    if config.get("cache") or config.get("offline"):
+        cache = HttpCache(max_size=config.get("cache_max_mb", 2048) * 1024 ** 2, offline=config.get("offline", False))
+    frontier = Frontier() if config.get("retomar") else None
+    depth = config.get("profundidade", "qa")
+    # Com vários processos, cada um fica com uma fração da taxa total
+    limiter = RateLimiter(
+        rate=config.get("taxa", 10.0) / max(1, config.get("workers", 1)),
+        max_retries=config.get("tentativas", 5),
+    )
+    metrics = Metrics()
+    # Um único pool de conexões por processo; no modo assíncrono ele precisa comportar a concorrência
+    http = HttpClients(
+        limiter, metrics, cache,
+        max_connections=config.get("conexoes") or max(MAX_CONNECTIONS, config.get("concorrencia", 10)),
+        keepalive_expiry=config.get("keepalive", KEEPALIVE_EXPIRY),
+        http2=config.get("http2", False),
+        timeouts=endpoint_timeouts(config.get("timeout_conexao"), config.get("timeout_leitura")),
+    )
+    return {
+        "parser": config.get("parser"),
+        "cache": cache,
+        "frontier": frontier,
+        "profile_index": ProfileIndex(),
+        "limiter": limiter,
+        "metrics": metrics,
+        "answers": AnswerCache(),
+        "http": http,
+        "depth": depth,
+        "snapshot": SnapshotIndex(depth=depth) if config.get("incremental") else None,
+    }
+
+
+def close_scraper_options(options: dict) -> None:
+    """Fecha os componentes criados por `build_scraper_options`."""
+    for name in ("http", "cache", "frontier", "profile_index", "snapshot"):
+        if options.get(name):
+            options[name].close()
+
+
+async def _plan_cities_async(cities: dict, concurrency: int, scraper_options: dict) -> dict:
+    """Sonda as cidades uma a uma com o scraper assíncrono, que consulta os grupos de bairros em paralelo."""
+    plans = {}
+    for city, url in cities.items():
+        scraper = AsyncDoctorScraper(base_url=url, city=city, concurrency=concurrency, **scraper_options)
+        try:
+            targets = await scraper.get_listing_targets()
+            plans[city] = targets if scraper.complete else []
+        except Exception as e:
+            logger.error(f"Erro ao sondar a cidade {city}: {e}")
+            plans[city] = []
+        finally:
+            await scraper.aclose()
+    return plans
+
+
+def plan_cities(cities: dict, scraper_options: dict, assincrono: bool = False, concorrencia: int = 10) -> dict:
+    """
+    Sonda o tamanho de cada cidade (número de páginas e, nas grandes, grupos
+    de bairros) antes da raspagem, com o scraper assíncrono se `assincrono`.
+    Retorna o plano de listagens por cidade; cidades que não puderam ser
+    sondadas, ou cujo plano ficou incompleto por falha em alguma consulta,
+    ficam com o plano vazio e são sondadas de novo na raspagem.
+    """
+    if assincrono:
+        plans = asyncio.run(_plan_cities_async(cities, concorrencia, scraper_options))
+    else:
+        plans = {}
+        for city, url in cities.items():
+            scraper = DoctorScraper(base_url=url, city=city, **scraper_options)
+            try:
+                targets = scraper.get_listing_targets()
+                plans[city] = targets if scraper.complete else []
+            except Exception as e:
+                logger.error(f"Erro ao sondar a cidade {city}: {e}")
+                plans[city] = []
+            finally:
+                scraper.close()
+    log_plan({city: plan_cost(targets) for city, targets in plans.items()})
+    return plans
+
+
+async def _scrape_async(city: str, url: str, sink: NDJSONSink, concurrency: int, targets: list,
+                        **scraper_options) -> bool:
+    """Raspa com o scraper assíncrono, gravando cada registro no sink. Retorna se a raspagem foi completa."""
+    scraper = AsyncDoctorScraper(base_url=url, city=city, concurrency=concurrency, **scraper_options)
+    try:
+        async for record in scraper.iter_scrape(targets):
+            sink.write(record)
+        return scraper.complete
+    finally:
+        await scraper.aclose()
+
+
+def scrape_to_file(city: str, url: str, path: str, assincrono: bool = False, concorrencia: int = 10,
+                   targets: list = None, parquet: bool = False, delta: bool = False, **scraper_options) -> tuple:
+    """
+    Raspa uma cidade (ou somente as listagens em `targets`) gravando os
+    registros em NDJSON à medida que são coletados. Com `parquet`, os
+    registros também vão para as tabelas Parquet normalizadas da cidade.
+    Com `delta`, as diferenças em relação à última raspagem são gravadas
+    em `data/delta` (requer `scraper_options["snapshot"]`).
+
+    Retorna `(registros gravados, completa)`; a raspagem é completa quando
+    nenhuma página ou perfil falhou.
+    """
+    sinks = [NDJSONSink(path)]
+    if parquet:
+        sinks.append(city_parquet_sink(city))
+    delta_sink = DeltaSink(city, scraper_options["snapshot"]) if delta else None
+    if delta_sink:
+        sinks.append(delta_sink)
+    sink = MultiSink(*sinks) if len(sinks) > 1 else sinks[0]
+    with sink:
+        if assincrono:
+            complete = asyncio.run(_scrape_async(city, url, sink, concorrencia, targets, **scraper_options))
+        else:
+            scraper = DoctorScraper(base_url=url, city=city, **scraper_options)
+            try:
+                sink.write_all(scraper.iter_scrape(targets))
+                complete = scraper.complete
+            finally:
+                scraper.close()
+        if delta_sink:
+            delta_sink.finish(complete)
+    return sink.count, complete
+
+
+def merge_parts(city: str, parts: list, frontier: Frontier = None, parquet: bool = False,
+                snapshot: SnapshotIndex = None, complete: bool = False) -> str:
+    """
+    Junta os arquivos das partes de uma cidade no arquivo da cidade.
+
+    Com fronteira, o arquivo é montado a partir dos registros guardados nela,
+    que incluem também os médicos coletados em execuções anteriores. Com
+    `parquet`, as tabelas Parquet da cidade são geradas a partir do arquivo
+    final, lido registro a registro, assim como as diferenças em relação à
+    última raspagem, com `snapshot`; os removidos só são calculados se
+    `complete` indicar que todas as partes terminaram sem falhas.
+    """
+    path = city_output_path(city)
+    if frontier:
+        with NDJSONSink(path) as sink:
+            sink.write_all(frontier.records(city))
+    else:
+        open(path, "w").close()
+        for part in parts:
+            if os.path.exists(part):
+                append_file(part, path)
+    for part in parts:
+        if os.path.exists(part):
+            os.remove(part)
+    if parquet:
+        with city_parquet_sink(city) as sink:
+            sink.write_all(iter_ndjson(path))
+    if snapshot:
+        with DeltaSink(city, snapshot) as sink:
+            sink.write_all(iter_ndjson(path))
+            sink.finish(complete)
+    return path
@@ -0,0 +1,192 @@
+import time
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import httpx
+
+from utils.setup_logger import logger
+from utils.endpoints import PROFILE
+
+# Respostas que indicam bloqueio ou instabilidade passageira do site
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+THROTTLE_STATUSES = {429, 503}
+MAX_RETRY_AFTER = 5 * 60
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Lê o cabeçalho `Retry-After`, em segundos ou como data HTTP."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+class RateLimiter:
+    """
+    Limite de requisições por segundo compartilhado por todas as requisições
+    de um processo (threads de reviews e tarefas assíncronas).
+
+    Usa um token bucket cuja taxa se ajusta sozinha: cai pela metade quando o
+    site responde com erro ou bloqueio e volta a subir aos poucos, até `rate`,
+    enquanto as respostas vierem bem-sucedidas. Um `Retry-After` pausa todas
+    as requisições pelo tempo pedido pelo site.
+
+    O limitador não dorme: `reserve()` retorna quanto tempo o chamador deve
+    esperar, para ser usado tanto com `time.sleep` quanto com `asyncio.sleep`.
+    """
+
+    def __init__(self, rate: float = 10.0, burst: int = None, min_rate: float = 0.5,
+                 max_retries: int = 5, backoff_base: float = 1.0, backoff_max: float = 60.0,
+                 cooldown: float = 5.0):
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cooldown = cooldown
+        self.retries = 0
+        self.throttled = 0
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Reserva uma requisição e retorna quantos segundos esperar antes de enviá-la."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def backoff(self, attempt: int) -> float:
+        """Espera exponencial com jitter ("full jitter") para a tentativa `attempt`."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    def on_success(self) -> None:
+        """Aumenta a taxa aos poucos depois de uma resposta bem-sucedida."""
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 100)
+
+    def on_failure(self, attempt: int, response: httpx.Response = None) -> float:
+        """
+        Registra uma falha passível de nova tentativa e retorna a espera antes
+        dela. Reduz a taxa pela metade, no máximo uma vez a cada `cooldown`
+        segundos, para que uma rajada de erros simultâneos não derrube a taxa
+        de uma vez.
+        """
+        retry_after = retry_after_seconds(response) if response is not None else None
+        delay = retry_after if retry_after is not None else self.backoff(attempt)
+        with self._lock:
+            self.retries += 1
+            now = time.monotonic()
+            if response is not None and response.status_code in THROTTLE_STATUSES:
+                self.throttled += 1
+                self._paused_until = max(self._paused_until, now + delay)
+            if now - self._last_decrease >= self.cooldown:
+                self._last_decrease = now
+                previous, self.rate = self.rate, max(self.min_rate, self.rate / 2)
+                if self.rate < previous:
+                    logger.warning(f"Reduzindo a taxa de requisições para {self.rate:.2f}/s.")
+        return delay
+
+
+def _describe(response: httpx.Response = None, error: Exception = None) -> str:
+    return f"HTTP {response.status_code}" if response is not None else f"{type(error).__name__}: {error}"
+
+
+class RateLimitTransport(httpx.BaseTransport):
+    """
+    Transporte síncrono do httpx que aplica o `RateLimiter` e repete as
+    requisições que falham por bloqueio, erro do servidor ou de rede.
+    """
+
+    def __init__(self, limiter: RateLimiter, transport: Optional[httpx.BaseTransport] = None, metrics=None):
+        self.limiter = limiter
+        self.metrics = metrics
+        self.transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 1
+        while True:
+            time.sleep(self.limiter.reserve())
+            try:
+                response = self.transport.handle_request(request)
+            except httpx.TransportError as e:
+                if attempt > self.limiter.max_retries:
+                    raise
+                response, error = None, e
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt > self.limiter.max_retries:
+                    if response.status_code not in RETRY_STATUSES:
+                        self.limiter.on_success()
+                    return response
+                response.close()
+                error = None
+            delay = self.limiter.on_failure(attempt, response)
+            if self.metrics:
+                self.metrics.record_retry(request.extensions.get("endpoint", PROFILE))
+            logger.warning(
+                f"Tentativa {attempt}/{self.limiter.max_retries + 1} falhou ({_describe(response, error)}) "
+                f"para {request.url}. Nova tentativa em {delay:.1f}s."
+            )
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncRateLimitTransport(httpx.AsyncBaseTransport):
+    """Versão assíncrona do `RateLimitTransport`."""
+
+    def __init__(self, limiter: RateLimiter, transport: Optional[httpx.AsyncBaseTransport] = None, metrics=None):
+        self.limiter = limiter
+        self.metrics = metrics
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 1
+        while True:
+            await asyncio.sleep(self.limiter.reserve())
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError as e:
+                if attempt > self.limiter.max_retries:
+                    raise
+                response, error = None, e
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt > self.limiter.max_retries:
+                    if response.status_code not in RETRY_STATUSES:
+                        self.limiter.on_success()
+                    return response
+                await response.aclose()
+                error = None
+            delay = self.limiter.on_failure(attempt, response)
+            if self.metrics:
+                self.metrics.record_retry(request.extensions.get("endpoint", PROFILE))
+            logger.warning(
+                f"Tentativa {attempt}/{self.limiter.max_retries + 1} falhou ({_describe(response, error)}) "
+                f"para {request.url}. Nova tentativa em {delay:.1f}s."
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
@@ -0,0 +1,79 @@
+import time
+import threading
+from typing import Optional
+
+from utils.setup_logger import logger
+
+# Intervalo mínimo, em segundos, entre dois relatórios de progresso
+REPORT_INTERVAL = 30.0
+
+
+def plan_cost(targets: list) -> int:
+    """Custo estimado de um plano de listagens: o número de páginas (cada página tem o mesmo número de médicos)."""
+    return sum(last_page for _, last_page, _ in targets)
+
+
+def largest_first(costs: dict) -> list:
+    """Ordena as chaves do maior para o menor custo, para que as tarefas longas não fiquem para o final."""
+    return sorted(costs, key=costs.get, reverse=True)
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+
+def log_plan(costs: dict) -> None:
+    """Registra o tamanho estimado de cada cidade, da maior para a menor."""
+    total = sum(costs.values())
+    logger.info(f"Plano: {len(costs)} cidade(s), {total} páginas de listagem no total.")
+    for city in largest_first(costs):
+        share = 100 * costs[city] / total if total else 0
+        logger.info(f"  {city}: {costs[city]} páginas ({share:.0f}%)")
+
+
+class ProgressTracker:
+    """
+    Acompanha as páginas de listagem concluídas e estima o tempo restante a
+    partir do ritmo observado até agora. O progresso é registrado no log a
+    cada `interval` segundos e ao final.
+
+    É compartilhado pelas threads do processo; com `--workers`, o processo
+    principal o avança a cada unidade de trabalho concluída.
+    """
+
+    def __init__(self, total: int, interval: float = REPORT_INTERVAL):
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.started_at = time.monotonic()
+        self._last_report = self.started_at
+        self._lock = threading.Lock()
+
+    def advance(self, cost: int = 1) -> None:
+        with self._lock:
+            self.done += cost
+            now = time.monotonic()
+            if now - self._last_report < self.interval and self.done < self.total:
+                return
+            self._last_report = now
+        self.report()
+
+    def eta(self) -> Optional[float]:
+        """Segundos estimados até o fim, ou `None` antes da primeira página concluída."""
+        if not self.done:
+            return None
+        elapsed = time.monotonic() - self.started_at
+        return elapsed / self.done * max(self.total - self.done, 0)
+
+    def report(self) -> None:
+        elapsed = time.monotonic() - self.started_at
+        percent = min(100 * self.done / self.total, 100) if self.total else 100
+        message = f"Progresso: {self.done}/{self.total} páginas ({percent:.0f}%) em {format_duration(elapsed)}"
+        eta = self.eta()
+        if eta is not None and self.done < self.total:
+            finish = time.strftime("%H:%M", time.localtime(time.time() + eta))
+            message += f"; término estimado em {format_duration(eta)} (às {finish})"
+        logger.info(message + ".")
@@ -1,246 +1,485 @@
 import re
 import json
+import math
 import time
 import httpx
+from typing import Iterator, Optional
+from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from httpx import HTTPStatusError, RequestError
-from bs4 import BeautifulSoup
 from tqdm import tqdm
 
+from src.dedup import AnswerCache, ProfileIndex
+from src.frontier import Frontier, PAGE_UNIT, PROFILE_UNIT, TARGETS_UNIT
+from src.http_cache import NETWORK_BYTES, HttpCache
+from src.http_client import HttpClients
+from src.metrics import Metrics
+from src.partition import DistrictPartitioner
+from src.rate_limit import RateLimiter
+from src.scheduler import ProgressTracker
+from src.snapshot import SnapshotIndex
 from utils.setup_logger import logger
-from utils.parsing import extract_specialties
+from utils.endpoints import DEPTHS, LISTING, PROFILE, REVIEWS, QUESTIONS, ANSWER
+from utils.html_parser import get_parser
+from utils.parsing import (
+    parse_full_answer,
+    parse_last_page,
+    parse_listing_item,
+    parse_profile,
+    parse_questions,
+    parse_reviews,
+    select_listing_items,
+)
+
+DISTRICTS_PATTERN = r"AVAILABLE_FILTERS:\s*(\[.*?\])\s*,\s*ACTIVE_FILTERS"
+MAX_PAGES = 500
+REVIEWS_PATH = "/ajax/mobile/doctor-opinions"
+REVIEWS_TIMEOUT = 20 * 60
+# Valores do cabeçalho X-Cache de respostas atendidas sem acessar a rede
+CACHE_HITS = {"HIT", "STALE"}
+
+
+def page_url(url: str, page: int) -> str:
+    """Monta a URL de uma página específica da listagem."""
+    return url.replace("page=1", f"page={page}")
+
+
+def district_url(url: str, batch: list) -> str:
+    """Monta a URL da listagem filtrada por um grupo de bairros."""
+    district_ids = "&".join([f"filters[districts][]={d['key']}" for d in batch])
+    return f"{url}&{district_ids}"
+
+
+def reviews_url(base_url: str, doctor_id: str, page: int) -> str:
+    """Monta a URL de uma página do endpoint de reviews, no mesmo domínio da listagem `base_url`."""
+    return urljoin(base_url, f"{REVIEWS_PATH}/{doctor_id}/{page}")
+
+
+def reviews_last_page(num_rows: int, limit: int) -> int:
+    """Calcula a última página do endpoint de reviews a partir do total e do tamanho da página."""
+    return math.ceil(int(num_rows) / int(limit)) if int(limit) > 0 else 1
+
+
+def extract_districts(html: str) -> list:
+    """Extrai a lista de bairros do JSON de filtros embutido no HTML."""
+    match = re.search(DISTRICTS_PATTERN, html, re.DOTALL)
+    if not match:
+        logger.warning("JSON de configuração não encontrado no HTML.")
+        return []
+
+    available_filters = json.loads(match.group(1))
+    districts_filter = next(
+        (f for f in available_filters if f["name"] == "districts"), None
+    )
+    if not districts_filter:
+        logger.warning("Filtro de bairros (districts) não encontrado.")
+        return []
+
+    districts = districts_filter.get("items", [])
+    logger.info(f"{len(districts)} bairros encontrados.")
+    return districts
+
 
 class DoctorScraper:
-    def __init__(self, base_url: str, city: str):
+    def __init__(self, base_url: str, city: str, review_workers: int = 4, parser: str = None,
+                 cache: HttpCache = None, frontier: Frontier = None, profile_index: ProfileIndex = None,
+                 limiter: RateLimiter = None, metrics: Metrics = None, answers: AnswerCache = None,
+                 depth: str = "qa", snapshot: SnapshotIndex = None, http: HttpClients = None,
+                 progress: ProgressTracker = None):
+        if depth not in DEPTHS:
+            raise ValueError(f"Profundidade desconhecida: {depth}. Opções: {', '.join(DEPTHS)}")
         self.base_url = base_url
         self.city = city
-        self.client = httpx.Client()
-        logger.info(f"Scraper inicializado para {city}.")
-
-    def get_last_page(self, url: str) -> int:
-        """Obtém o número da última página a partir da paginação."""
-        max_retries = 3
-
-        for attempt in range(1, max_retries + 1):
-            try:
-                response = self.client.get(url, timeout=10)
-                response.raise_for_status()
-                soup = BeautifulSoup(response.text, "html.parser")
-                last_page_tags = soup.select("a.page-link:not([aria-label='next'])")
-                if last_page_tags:
-                    last_page = int(last_page_tags[-1].text.strip())
-                    logger.info(f"Última página encontrada: {last_page}")
-                    return last_page
-                else:
-                    logger.warning("Não foi possível encontrar a última página.")
-                    return 1
-            except (HTTPStatusError, RequestError) as e:
-                logger.warning(f"Tentativa {attempt}/{max_retries} falhou. Erro: {e}")
-                if attempt == max_retries:
-                    logger.error(f"Erro ao obter última página após {max_retries} tentativas: {e}")
-                    return 1
-            except Exception as e:
-                logger.error(f"Erro inesperado ao obter última página: {e}")
+        self.review_workers = review_workers
+        self.depth = depth
+        self.snapshot = snapshot
+        self.progress = progress
+        self.parser = get_parser(parser)
+        self.cache = cache
+        self.frontier = frontier
+        self.profile_index = profile_index
+        self.limiter = limiter or (http.limiter if http else RateLimiter())
+        self.metrics = metrics or (http and http.metrics) or Metrics()
+        self.answers = answers or AnswerCache()
+        # Páginas de listagem (ou planos) que falharam ou ficaram com perfis faltando nesta execução
+        self.failed_pages = 0
+        # Sem clientes compartilhados, o scraper cria os seus e os fecha em `close`
+        self.http = http or HttpClients(self.limiter, self.metrics, cache)
+        self._owns_http = http is None
+        self.client = self._create_client()
+        logger.info(f"Scraper inicializado para {city} (parser: {self.parser.name}, profundidade: {depth}).")
+
+    def _create_client(self):
+        """Retorna o cliente HTTP síncrono, compartilhado pelos scrapers que usam os mesmos `HttpClients`."""
+        return self.http.client
+
+    @property
+    def complete(self) -> bool:
+        """Indica se tudo o que foi percorrido até agora foi coletado sem falhas."""
+        return self.failed_pages == 0
+
+    def close(self):
+        """Fecha o cliente HTTP, se foi criado pelo próprio scraper."""
+        if self._owns_http:
+            self.http.close()
+
+    def _get(self, url: str, endpoint: str) -> httpx.Response:
+        """Executa um GET, identificando o tipo de endpoint para o cache e as métricas."""
+        start = time.perf_counter()
+        try:
+            response = self.client.get(url, timeout=self.http.timeout(endpoint), extensions={"endpoint": endpoint})
+            response.raise_for_status()
+        except (HTTPStatusError, RequestError):
+            self.metrics.observe_request(endpoint, time.perf_counter() - start, error=True)
+            raise
+        self._observe_response(endpoint, response, time.perf_counter() - start)
+        return response
+
+    def _observe_response(self, endpoint: str, response: httpx.Response, seconds: float) -> None:
+        """
+        Registra a requisição nas métricas. Os bytes são os baixados da rede
+        (ainda comprimidos); respostas atendidas pelo cache não contam.
+        """
+        cache_hit = response.headers.get("X-Cache") in CACHE_HITS
+        size = 0 if cache_hit else response.extensions.get(NETWORK_BYTES, response.num_bytes_downloaded)
+        self.metrics.observe_request(endpoint, seconds, size, cache_hit=cache_hit)
+
+    def _soup(self, html: str):
+        """Monta a árvore HTML a partir do conteúdo da resposta, usando o backend configurado."""
+        return self.parser.parse(html)
+
+    def _extract(self, endpoint: str, extractor, html: str, *args):
+        """Monta a árvore e aplica a função de extração, medindo o tempo gasto nas métricas."""
+        with self.metrics.timed_parse(endpoint):
+            return extractor(self._soup(html), *args)
+
+    def _wants(self, depth: str) -> bool:
+        """Indica se a profundidade configurada inclui `depth`."""
+        return DEPTHS.index(self.depth) >= DEPTHS.index(depth)
+
+    def _reuse_record(self, row: dict) -> dict:
+        """
+        Com o índice da última raspagem (modo incremental), monta o registro
+        com os detalhes guardados se os dados do médico na listagem não
+        mudaram e a raspagem anterior foi ao menos tão profunda quanto a atual.
+        """
+        if not self.snapshot or not row["link_to_profile"]:
+            return None
+        stored = self.snapshot.lookup(row)
+        if stored is None:
+            return None
+        details, depth = stored
+        if depth not in DEPTHS or DEPTHS.index(depth) < DEPTHS.index(self.depth):
+            return None
+        self.metrics.increment("delta_reused")
+        return self._build_record(row, details)
+
+    def _build_record(self, row: dict, profile_details: dict) -> dict:
+        """Monta o registro final do médico no formato retornado por `scrape`."""
+        return {
+            "professional": row["professional"],
+            "specialties": row["specialties"],
+            "register_id": row["register_id"],
+            "reviews": row["reviews"],
+            "link_to_profile": row["link_to_profile"],
+            "city": self.city,
+            "data": profile_details,
+        }
+
+    def _partition_targets(self, partitioner: DistrictPartitioner) -> list:
+        """
+        Converte os grupos de bairros finais do particionador em listagens a percorrer.
+
+        Bairros que ficaram sem cobertura por falha na consulta deixam o plano incompleto.
+        """
+        partitioner.log_report(self.city)
+        if not partitioner.complete:
+            self.failed_pages += 1
+        return [
+            (district_url(self.base_url, batch), pages, ", ".join(d["name"] for d in batch))
+            for batch, pages in partitioner.plan()
+        ]
+
+    def get_last_page(self, url: str) -> Optional[int]:
+        """
+        Obtém o número da última página a partir da paginação.
+
+        Retorna 1 quando a listagem não tem paginação e `None` quando a consulta falhou.
+        """
+        try:
+            response = self._get(url, LISTING)
+            last_page = self._extract(LISTING, parse_last_page, response.text)
+            if last_page:
+                logger.info(f"Última página encontrada: {last_page}")
+                return last_page
+            else:
+                logger.warning("Não foi possível encontrar a última página.")
                 return 1
+        except (HTTPStatusError, RequestError) as e:
+            logger.error(f"Erro ao obter última página: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Erro inesperado ao obter última página: {e}")
+            return None
 
     def get_districts(self, url: str) -> list:
         """Obtém a lista de bairros disponíveis a partir do JSON embutido no HTML."""
-
-        pattern = r"AVAILABLE_FILTERS:\s*(\[.*?\])\s*,\s*ACTIVE_FILTERS"
-
         try:
-            response = self.client.get(url, timeout=10)
-            response.raise_for_status()
-            match = re.search(pattern, response.text, re.DOTALL)    
-            if not match:
-                logger.warning("JSON de configuração não encontrado no HTML.")
-                return []
-
-            available_filters = json.loads(match.group(1))
-            districts_filter = next(
-                (f for f in available_filters if f["name"] == "districts"), None
-            )
-            if not districts_filter:
-                logger.warning("Filtro de bairros (districts) não encontrado.")
-                return []
-
-            districts = districts_filter.get("items", [])
-            logger.info(f"{len(districts)} bairros encontrados.")
-            return districts
+            response = self._get(url, LISTING)
+            return extract_districts(response.text)
         except Exception as e:
             logger.error(f"Erro ao obter lista de bairros: {e}")
             return []
 
-    def scrape_page(self, url: str) -> list:
-        """Raspa os dados de uma única página."""
+    def _unit_done(self, kind: str, key: str) -> bool:
+        """Indica se a unidade já foi concluída em uma execução anterior."""
+        return bool(self.frontier) and self.frontier.is_done(self.city, kind, key)
+
+    def _unit_start(self, kind: str, key: str) -> None:
+        if self.frontier:
+            self.frontier.start(self.city, kind, key)
+
+    def _unit_finish(self, kind: str, key: str, data=None) -> None:
+        if self.frontier:
+            self.frontier.finish(self.city, kind, key, data)
+
+    def _saved_targets(self):
+        """Recupera da fronteira o plano de listagens de uma execução anterior."""
+        if not self.frontier:
+            return None
+        targets = self.frontier.get(self.city, TARGETS_UNIT, self.base_url)
+        if targets is None:
+            return None
+        logger.info(f"Plano de listagens de {self.city} recuperado da fronteira ({len(targets)} listagens).")
+        return [tuple(target) for target in targets]
+
+    def get_listing_targets(self) -> list:
+        """
+        Define as listagens a serem percorridas para a cidade.
+
+        Retorna uma lista de tuplas `(url, última página, bairros)`. Quando a
+        cidade excede o limite de páginas, cada tupla é um grupo de bairros;
+        caso contrário há uma única tupla, com `bairros` vazio.
+        """
+        targets = self._saved_targets()
+        if targets is None:
+            failures = self.failed_pages
+            targets = self._plan_listing_targets()
+            # Um plano com consultas que falharam não é salvo, para ser refeito na próxima execução
+            if targets and self.failed_pages == failures:
+                self._unit_finish(TARGETS_UNIT, self.base_url, targets)
+        return targets
+
+    def _plan_listing_targets(self) -> list:
+        """Consulta o site para montar o plano de listagens da cidade."""
+        last_page = self.get_last_page(self.base_url)
+        if last_page is None:
+            logger.error("Não foi possível obter o número de páginas da cidade. Abortando.")
+            self.failed_pages += 1
+            return []
+        if last_page <= MAX_PAGES:
+            return [(self.base_url, last_page, None)]
+
+        logger.info(f"Número de páginas ({last_page}) excede o limite de {MAX_PAGES}. Aplicando filtro por bairros.")
+        districts = self.get_districts(self.base_url)
+        if not districts:
+            logger.error("Não foi possível obter a lista de bairros. Abortando.")
+            self.failed_pages += 1
+            return []
+
+        # Divide os grupos que passam do limite e junta os pequenos, consultando o número de páginas de cada grupo
+        partitioner = DistrictPartitioner(districts, MAX_PAGES, total_pages=last_page)
+        while True:
+            batches = partitioner.next_probes()
+            if not batches:
+                break
+            for batch in batches:
+                partitioner.feed(batch, self.get_last_page(district_url(self.base_url, batch)))
+        return self._partition_targets(partitioner)
+
+    def _begin_profile(self, row: dict, district: str = None) -> bool:
+        """
+        Decide se os detalhes do perfil devem ser buscados.
+
+        Retorna `False` se o perfil já foi concluído em uma execução anterior
+        (fronteira) ou se já foi encontrado nesta execução (índice de perfis);
+        nesse caso só a associação com a cidade/bairro é registrada.
+        """
+        link = row["link_to_profile"]
+        if self._unit_done(PROFILE_UNIT, link):
+            return False
+        if self.profile_index and link and not self.profile_index.claim(link, self.city, district):
+            return False
+        self._unit_start(PROFILE_UNIT, link)
+        return True
+
+    def _end_profile(self, row: dict, record: dict = None) -> None:
+        """Registra o resultado do perfil: concluído com o registro ou liberado após uma falha."""
+        link = row["link_to_profile"]
+        if record is None:
+            if self.profile_index and link:
+                self.profile_index.release(link)
+            return
+        self._unit_finish(PROFILE_UNIT, link, record)
+        if self.profile_index and link:
+            self.profile_index.complete(link)
+
+    def scrape_page(self, url: str, district: str = None) -> list:
+        """
+        Raspa os dados de uma única página.
+
+        Com fronteira, páginas e perfis já concluídos em execuções anteriores
+        são pulados, e a página só é marcada como concluída quando todos os
+        seus médicos foram coletados. Com índice de perfis, médicos já vistos
+        nesta execução não têm os detalhes buscados de novo.
+        """
+        if self._unit_done(PAGE_UNIT, url):
+            logger.info("Página já concluída em execução anterior.")
+            return []
         try:
-            response = self.client.get(url, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
+            self._unit_start(PAGE_UNIT, url)
+            response = self._get(url, LISTING)
             doctors = []
-            all_doctors = soup.select("#search-content > ul > li")
-            for i, item in enumerate(all_doctors):
+            complete = True
+            all_doctors = self._extract(LISTING, select_listing_items, response.text)
+            for item in all_doctors:
                 try:
-                    link_tag = item.select_one("a")
-                    name_tag = item.select_one("span[itemprop='name']")
-                    reviews_tag = item.select_one("span.opinion-numeral")
-                    span_tags = [span.text.strip() for span in item.select("div.dp-doctor-card + span")]
-                    specialties_tag = item.select_one("span[data-test-id='doctor-specializations']")
-
-                    link_to_profile = link_tag["href"] if link_tag else None
-                    professional = name_tag.text.strip() if name_tag else None
-                    reviews = (
-                        int(reviews_tag.text.strip().split()[0]) if reviews_tag else 0
-                    )
-                    specialties = extract_specialties(specialties_tag.text.strip() if specialties_tag else "")
-                    register_id = ' '.join(span_tags)
+                    row = parse_listing_item(item)
+                    if not self._begin_profile(row, district):
+                        continue
 
                     # Busca detalhes do perfil
-                    profile_details = self.get_profile_details(link_to_profile, reviews)
-                    logger.info(f"Dados do {profile_details['Name']} Extraído com sucesso ({i+1}/{len(all_doctors)})")
-                    doctors.append({
-                        "professional": professional,
-                        "specialties": specialties,
-                        "register_id": register_id,
-                        "reviews": reviews,
-                        "link_to_profile": link_to_profile,
-                        "city": self.city,
-                        "data": profile_details,
-                    })
+                    record = None
+                    try:
+                        record = self.get_record(row)
+                    finally:
+                        self._end_profile(row, record)
+                    if record is None:
+                        complete = False
+                        continue
+                    doctors.append(record)
 
                 except Exception as e:
+                    complete = False
                     logger.error(f"Erro ao processar dados de um médico: {e}")
+            if complete:
+                self._unit_finish(PAGE_UNIT, url)
+            else:
+                self.failed_pages += 1
             logger.info(f"{len(doctors)} médicos encontrados na página.")
             return doctors
         except Exception as e:
+            self.failed_pages += 1
             logger.error(f"Erro ao raspar página: {e}")
             return []
-    
+
+    def get_listing_rows(self, url: str) -> list:
+        """
+        Busca uma página de listagem e extrai os médicos dela, sem buscar os
+        perfis. Ao contrário de `scrape_page`, erros não são tratados aqui.
+        """
+        return self._parse_listing_rows(self._get(url, LISTING).text)
+
+    def _parse_listing_rows(self, html: str) -> list:
+        """Extrai os médicos do HTML de uma página de listagem."""
+        return [parse_listing_item(item) for item in self._extract(LISTING, select_listing_items, html)]
+
+    def get_record(self, row: dict) -> dict:
+        """
+        Monta o registro de um médico da listagem, buscando só o que a
+        profundidade configurada pede. Na profundidade `listing`, o registro
+        tem só os dados da listagem (`data` vazio); no modo incremental, os
+        detalhes de médicos inalterados vêm da última raspagem. Retorna `None`
+        se a busca do perfil falhou.
+        """
+        if not self._wants("profile"):
+            return self._build_record(row, {})
+        record = self._reuse_record(row)
+        if record:
+            return record
+        details = self.get_profile_details(row["link_to_profile"], row["reviews"])
+        return self._build_record(row, details) if details else None
+
     def get_profile_details(self, profile_url: str, reviews_count: int) -> dict:
-        """Obtém informações adicionais do perfil do profissional."""
+        """
+        Obtém informações adicionais do perfil do profissional.
+
+        As páginas extras de reviews só são buscadas a partir da profundidade
+        `reviews`, e as perguntas e respostas só na profundidade `qa`; abaixo
+        dela, o campo "Health Questions and Answers" fica de fora. Se a busca
+        das perguntas falhar, o campo fica `None`.
+        """
         try:
-            response = self.client.get(profile_url, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-
-            origin_url = profile_url
-            name = soup.select_one("div.unified-doctor-header-info__name span[itemprop='name']")
-            about = soup.select_one("div.about-description")
-            experience_tags = soup.select(".modal-body div.mb-3 ~ div.mb-2")
-            insurance_cover = soup.select_one("div[data-id='check-your-insurance-vue'] p.text-muted")
-            age_public_range = soup.select_one("div[data-test-id='doctor-address-allowed-patients']")
-
-            # Experiência formatada
-            experience = []
-            social_links = []
-            for tag in experience_tags:
-                link_tag = tag.select('a[target="_blank"]')
-                if link_tag:
-                    experience.append(''.join([tag.text.split()[0], ' ', tag.text.split()[1]]))
-                    for link in link_tag:
-                        experience.append(f"{link.text.strip()} ({link['href']})")
-                        social_links.append({
-                            "Social Network": link.text.strip(),
-                            "URL": link['href']
-                        })
-                else:
-                    experience.append(tag.text.strip())
-
-            # Serviços médicos
-            services = []
-            for service in soup.select("div[data-id='services-list-container'] > div"):
-                service_name = service.select_one("p[itemprop='availableService']")
-                price_tag = service.select_one("div.mr-1")
-                price = int(re.search(r"\d+", price_tag.text).group()) if price_tag and re.search(r"\d+", price_tag.text) else None
-                services.append({
-                    "Service Name": service_name.text.strip() if service_name else None,
-                    "Price": price,
-                })
-
-            reviews = []
-            for review in soup.select("div.opinion.d-block"):
-                reviewer_name = review.select_one("span[itemprop='name']")
-                review_date = review.select_one("time")
-                review_comment = review.select_one("p[itemprop='reviewBody']")
-                reviews.append({
-                    "Reviewer Name": reviewer_name.text.strip() if reviewer_name else None,
-                    "Review Date": review_date.text.strip() if review_date else None,
-                    "Review Comment": review_comment.text.strip() if review_comment else None,
-                })
-            
-            if len(reviews) < reviews_count:
+            response = self._get(profile_url, PROFILE)
+            details = self._extract(PROFILE, parse_profile, response.text, profile_url)
+            doctor_id = details.pop("doctor_id")
+            link_questions = details.pop("link_questions")
+
+            reviews = details["Patient Reviews"]
+            if len(reviews) < reviews_count and doctor_id and self._wants("reviews"):
                 logger.info(f"A procesar {reviews_count} Reviews")
-                doctor_id = soup.select_one("div[data-doctor-id]")["data-doctor-id"]
-                reviews = self.get_all_reviews(reviews, doctor_id, reviews_count)
+                details["Patient Reviews"] = self.get_all_reviews(reviews, doctor_id, reviews_count)
 
             # Obter perguntas e respostas
-            link_questions = (
-                soup.select_one('a[data-patient-app-event-name="dp-load-more-questions"]')['href']
-                if soup.select_one('a[data-patient-app-event-name="dp-load-more-questions"]')
-                else None
-            )
-            health_questions_and_answers = self.get_all_questions(link_questions) if link_questions else []
-            return {
-                "Origin URL": origin_url,
-                "Name": name.text.strip() if name else None,
-                "About": about.text.strip() if about else None,
-                "Experience": " ".join(experience),
-                "Social Links": social_links,
-                "Insurance Cover": insurance_cover.text.strip() if insurance_cover else None,
-                "AgePublic Range": age_public_range.text.strip() if age_public_range else None,
-                "Medical Services": services,
-                "Patient Reviews": reviews,
-                "Health Questions and Answers": health_questions_and_answers
-            }
+            if self._wants("qa"):
+                details["Health Questions and Answers"] = self.get_all_questions(link_questions) if link_questions else []
+            return details
         except Exception as e:
             logger.error(f"Erro ao obter detalhes do perfil: {e}")
             return {}
-        
-    def get_all_reviews(self, reviews: list, doctor_id: str, reviews_count: int) -> list:
-        """Obtém todas as reviews do profissional a partir do endpoint."""
-
-        try:
-            base_url = f"https://www.doctoralia.com.br/ajax/mobile/doctor-opinions/{doctor_id}"
-            page = 2
-            start_time = time.time()
 
-            with tqdm(total=reviews_count, desc=f"Processando Reviews", unit=' Reviews') as pbar:
-                pbar.update(len(reviews))
-                while True:
+    def _get_reviews_page(self, doctor_id: str, page: int) -> dict:
+        """Busca uma página do endpoint de reviews, validando o formato da resposta."""
+        data = self._get(reviews_url(self.base_url, doctor_id, page), REVIEWS).json()
+        if "html" not in data or "numRows" not in data or "limit" not in data:
+            raise ValueError("Resposta inesperada do endpoint de reviews.")
+        return data
 
-                    # Verifica se o tempo de execução excedeu 20 minutos
-                    elapsed_time = time.time() - start_time
-                    if elapsed_time > 20 * 60:
-                        logger.warning("Interrompendo: tempo de execução excedeu 20 minutos.")
-                        break
+    def _parse_reviews_page(self, data: dict) -> list:
+        """Extrai as reviews do HTML retornado pelo endpoint de reviews."""
+        return self._extract(REVIEWS, parse_reviews, data["html"], 'div[class="opinion d-block"]')
 
-                    response = self.client.get(f"{base_url}/{page}", timeout=10)
-                    response.raise_for_status()
-                    data = response.json()
-                    if "html" not in data or "numRows" not in data or "limit" not in data:
-                        logger.warning("Resposta inesperada do endpoint de reviews.")
-                        break
+    def _fetch_reviews_page(self, doctor_id: str, page: int) -> list:
+        """Busca e extrai as reviews de uma página do endpoint."""
+        return self._parse_reviews_page(self._get_reviews_page(doctor_id, page))
 
-                    soup = BeautifulSoup(data["html"], "html.parser")
-                    review_blocks = soup.select('div[class="opinion d-block"]')
+    def get_all_reviews(self, reviews: list, doctor_id: str, reviews_count: int) -> list:
+        """
+        Obtém todas as reviews do profissional a partir do endpoint.
 
-                    for review in review_blocks:
-                        reviewer_name = review.select_one("span[itemprop='name']")
-                        review_date = review.select_one("time")
-                        review_comment = review.select_one("p[itemprop='reviewBody']")
-                        reviews.append({
-                            "Reviewer Name": reviewer_name.text.strip() if reviewer_name else None,
-                            "Review Date": review_date.text.strip() if review_date else None,
-                            "Review Comment": review_comment.text.strip() if review_comment else None,
-                        })
+        A primeira página do endpoint informa o total de reviews (`numRows`) e o
+        tamanho da página (`limit`), então as páginas restantes são buscadas em
+        paralelo e juntadas na ordem original.
+        """
 
-                    pbar.update(data['limit'])
+        try:
+            deadline = time.time() + REVIEWS_TIMEOUT
+            data = self._get_reviews_page(doctor_id, 2)
+            pages = {2: self._parse_reviews_page(data)}
+            last_page = reviews_last_page(data["numRows"], data["limit"])
 
-                    # Verificar se já coletamos todas as reviews
-                    if len(reviews) >= reviews_count:
-                        break
+            with tqdm(total=reviews_count, desc=f"Processando Reviews", unit=' Reviews') as pbar:
+                pbar.update(len(reviews) + len(pages[2]))
+                with ThreadPoolExecutor(max_workers=self.review_workers) as executor:
+                    futures = {
+                        executor.submit(self._fetch_reviews_page, doctor_id, page): page
+                        for page in range(3, last_page + 1)
+                    }
+                    try:
+                        for future in as_completed(futures, timeout=max(deadline - time.time(), 0)):
+                            page = futures[future]
+                            try:
+                                pages[page] = future.result()
+                                pbar.update(len(pages[page]))
+                            except Exception as e:
+                                logger.warning(f"Erro ao obter a página {page} de reviews: {e}")
+                    except FuturesTimeoutError:
+                        logger.warning("Interrompendo: tempo de execução excedeu 20 minutos.")
+                        for future in futures:
+                            future.cancel()
 
-                    # Incrementa para próxima página
-                    page += 1
+            for page in sorted(pages):
+                reviews.extend(pages[page])
 
             logger.info(f"Todas as {len(reviews)} reviews coletadas.")
             return reviews
@@ -248,98 +487,93 @@ class DoctorScraper:
             logger.error(f"Erro ao obter todas as reviews: {e}")
             return []
 
-    def get_all_questions(self, url: str) -> list:
-        """Obtém todas as perguntas e respostas dos médicos."""
+    def get_all_questions(self, url: str) -> Optional[list]:
+        """
+        Obtém todas as perguntas e respostas dos médicos.
+
+        Os links de respostas completas são coletados de cada bloco de
+        pergunta, e os links distintos são buscados em paralelo; uma resposta
+        que não pôde ser buscada fica com `Answer Text` `None`. Retorna `None`
+        se a página de perguntas não pôde ser obtida.
+        """
 
         try:
-            response = self.client.get(url, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-            questions_and_answers = []
-            question_blocks = soup.select('div[data-id="question-box"]')
-
-            for question_block in question_blocks:
-                question = question_block.select_one("p.doctor-question-body").text.strip()
-                category = question_block.select_one("div.text-muted a")
-                answer_date = question_block.select_one("time").text.strip()
-                
-                # Pega o texto completo, se tiver, senão pega pelo link
-                p_tag = soup.find('p', class_="mb-0", itemprop="text")
-                if p_tag:
-                    a_tag = p_tag.find('a')
-                    if a_tag and 'href' in a_tag.attrs:
-                        link_answer = a_tag['href']
-                        answer = self.get_full_answer(link_answer)
-                    else:
-                        answer = p_tag.text.strip()
-                else:
-                    answer = None
-
-                # Adiciona a resposta ao dicionário de perguntas e respostas
-                questions_and_answers.append({
-                    "Question Title": question,
-                    "Question Category": category.text.strip() if category else None,
-                    "Full Question": question,
-                    "Answer Date": answer_date,
-                    "Answer Text": answer
-                })
-            
+            response = self._get(url, QUESTIONS)
+            questions_and_answers = self._extract(QUESTIONS, parse_questions, response.text)
+
+            links = [question.pop("link_answer") for question in questions_and_answers]
+            unique_links = list(dict.fromkeys(link for link in links if link))
+            if len(unique_links) > 1:
+                with ThreadPoolExecutor(max_workers=min(self.review_workers, len(unique_links))) as executor:
+                    answers = dict(zip(unique_links, executor.map(self.get_full_answer, unique_links)))
+            else:
+                answers = {link: self.get_full_answer(link) for link in unique_links}
+
+            for question, link in zip(questions_and_answers, links):
+                if link:
+                    question["Answer Text"] = answers[link]
+
             return questions_and_answers
-        
+
         except Exception as e:
             logger.error(f"Erro ao obter todas as perguntas e respostas: {e}")
-            return []
-
-    def get_full_answer(self, link: str) -> str:
-        """Obtém a resposta completa do profissional a partir da URL."""
+            return None
+
+    def get_full_answer(self, link: str) -> Optional[str]:
+        """
+        Obtém a resposta completa do profissional a partir da URL, reaproveitando
+        as já buscadas na execução. Retorna `None` se a busca falhou.
+        """
+        answer = self.answers.get(link)
+        if answer is not None:
+            self.metrics.increment("answer_cache_hits")
+            return answer
 
         try:
-            response = self.client.get(link, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-            answer = soup.select_one("div.doctor-answer-content").text.strip()
+            response = self._get(link, ANSWER)
+            answer = self._extract(ANSWER, parse_full_answer, response.text)
+            self.answers.put(link, answer)
             return answer
         except Exception as e:
             logger.error(f"Erro ao obter a resposta completa: {e}")
-            return ""
+            return None
 
-    def scrape(self) -> list:
-        """Orquestra o processo de raspagem para todas as páginas."""
-        
-        logger.info(f"Iniciando raspagem para a cidade: {self.city}")
-        all_doctors = []
-        last_page = self.get_last_page(self.base_url)
+    def iter_scrape(self, targets: list = None) -> Iterator[dict]:
+        """
+        Percorre todas as páginas, produzindo os registros dos médicos à medida
+        que cada página é concluída.
 
-        if last_page > 500:
-            logger.info(f"Número de páginas ({last_page}) excede o limite de 500. Aplicando filtro por bairros.")
-            districts = self.get_districts(self.base_url)
-            if not districts:
-                logger.error("Não foi possível obter a lista de bairros. Abortando.")
-                return []
-
-            # Dividir os bairros em grupos de 10
-            qtde_bairros_processar = 0
-            district_batches = [districts[i:i + 10] for i in range(0, len(districts), 10)]
-            for batch in district_batches:
-                qtde_bairros_processar += len(batch)
-                district_ids = "&".join([f"filters[districts][]={d['key']}" for d in batch])
-                filtered_url = f"{self.base_url}&{district_ids}"
-                logger.info(f"Processando {qtde_bairros_processar}/{len(districts)} bairros > {', '.join(d['name'] for d in batch)}")
-
-                # Raspagem para o filtro atual
-                filtered_last_page = self.get_last_page(filtered_url)
-                for page in range(1, filtered_last_page + 1):
-                    logger.info(f"Raspando página {page}/{filtered_last_page} Filtrando por bairros {qtde_bairros_processar}/{len(districts)}...")
-                    page_url = filtered_url.replace("page=1", f"page={page}")
-                    doctors = self.scrape_page(page_url)
-                    all_doctors.extend(doctors)
-        else:
-            # Processar todas as páginas normalmente
+        Com fronteira, os médicos coletados em execuções anteriores são
+        produzidos primeiro. Quando `targets` é informado, percorre somente
+        essas listagens (ex.: parte de uma cidade dividida entre processos) e
+        não repete os registros anteriores.
+        """
+
+        logger.info(f"Iniciando raspagem para a cidade: {self.city}")
+        total = 0
+        if self.frontier and targets is None:
+            for record in self.frontier.records(self.city):
+                total += 1
+                yield record
+            if total:
+                logger.info(f"{total} médicos recuperados da fronteira.")
+
+        if targets is None:
+            targets = self.get_listing_targets()
+        if not targets:
+            self.failed_pages += 1
+        for url, last_page, label in targets:
             for page in range(1, last_page + 1):
-                logger.info(f"Raspando página {page}/{last_page}...")
-                page_url = self.base_url.replace("page=1", f"page={page}")
-                doctors = self.scrape_page(page_url)
-                all_doctors.extend(doctors)
+                logger.info(f"Raspando página {page}/{last_page} ({label or self.city})...")
+                for record in self.scrape_page(page_url(url, page), label):
+                    total += 1
+                    self.metrics.increment("doctors")
+                    yield record
+                if self.progress:
+                    self.progress.advance()
 
-        logger.info(f"Raspagem concluída para {self.city}. Total de médicos: {len(all_doctors)}")
-        return all_doctors
\ No newline at end of file
+        logger.info(f"Raspagem concluída para {self.city}. Total de médicos: {total}")
+
+    def scrape(self) -> list:
+        """Orquestra o processo de raspagem para todas as páginas."""
+        return list(self.iter_scrape())
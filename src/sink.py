@@ -0,0 +1,99 @@
+import os
+import json
+import time
+import shutil
+from typing import Iterable, Iterator
+
+
+class NDJSONSink:
+    """
+    Grava registros em NDJSON (um objeto JSON por linha) à medida que são produzidos.
+
+    O arquivo é descarregado em disco a cada `flush_every` registros ou a cada
+    `flush_interval` segundos, o que acontecer primeiro, então nada precisa
+    ficar acumulado em memória.
+    """
+
+    def __init__(self, path: str, mode: str = "w", flush_every: int = 100, flush_interval: float = 5.0):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.count = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, mode, encoding="utf-8")
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def write(self, record: dict) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write("\n")
+        self.count += 1
+        self._pending += 1
+        if self._pending >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def write_all(self, records: Iterable[dict]) -> int:
+        """Grava todos os registros do iterável, retornando quantos foram gravados."""
+        start = self.count
+        for record in records:
+            self.write(record)
+        return self.count - start
+
+    def flush(self) -> None:
+        self._file.flush()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MultiSink:
+    """Repassa cada registro para vários sinks (ex.: NDJSON e Parquet ao mesmo tempo)."""
+
+    def __init__(self, *sinks):
+        self.sinks = sinks
+        self.count = 0
+
+    def write(self, record: dict) -> None:
+        for sink in self.sinks:
+            sink.write(record)
+        self.count += 1
+
+    def write_all(self, records: Iterable[dict]) -> int:
+        start = self.count
+        for record in records:
+            self.write(record)
+        return self.count - start
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_ndjson(path: str) -> Iterator[dict]:
+    """Lê um arquivo NDJSON registro a registro."""
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def append_file(source: str, destination: str) -> None:
+    """Acrescenta o conteúdo de um arquivo ao final de outro, sem carregá-lo em memória."""
+    with open(source, "rb") as src, open(destination, "ab") as dst:
+        shutil.copyfileobj(src, dst)
@@ -0,0 +1,264 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import threading
+from typing import Iterator, Optional
+
+from src.dedup import normalize_profile_url
+from src.sink import NDJSONSink
+from utils.setup_logger import logger
+from utils.endpoints import DEPTHS
+
+SNAPSHOT_PATH = "data/snapshot.db"
+DELTA_DIR = "data/delta"
+
+ADDED = "added"
+CHANGED = "changed"
+REMOVED = "removed"
+
+# Campos da listagem que indicam mudança no perfil (ex.: uma review nova muda o número de reviews)
+LISTING_FIELDS = ("professional", "specialties", "register_id", "reviews")
+
+
+def _digest(value) -> str:
+    return hashlib.sha1(json.dumps(value, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def listing_hash(row: dict) -> str:
+    """Hash dos dados de um médico na listagem."""
+    return _digest([row.get(field) for field in LISTING_FIELDS])
+
+
+def content_hash(record: dict) -> str:
+    """Hash do registro completo do médico, sem a cidade."""
+    return _digest({key: value for key, value in record.items() if key != "city"})
+
+
+def is_shallower(depth: str, other: str) -> bool:
+    """Indica se a profundidade `depth` é mais rasa que `other`."""
+    if depth not in DEPTHS or other not in DEPTHS:
+        return False
+    return DEPTHS.index(depth) < DEPTHS.index(other)
+
+
+def is_degraded(record: dict, depth: str) -> bool:
+    """
+    Indica se o registro, raspado na profundidade `depth`, ficou sem parte dos
+    detalhes por falha em alguma busca: reviews faltando (a partir de
+    `reviews`), perguntas ou respostas completas que não puderam ser obtidas
+    (em `qa`).
+    """
+    data = record.get("data") or {}
+    if not data:
+        return False
+    if not is_shallower(depth, "reviews") and len(data.get("Patient Reviews") or []) < (record.get("reviews") or 0):
+        return True
+    if not is_shallower(depth, "qa"):
+        questions = data.get("Health Questions and Answers")
+        if questions is None or any("Answer Text" in question and question["Answer Text"] is None
+                                    for question in questions):
+            return True
+    return False
+
+
+def delta_output_path(city: str) -> str:
+    """Caminho do arquivo NDJSON com as diferenças de uma cidade."""
+    return os.path.join(DELTA_DIR, f"{city.replace(' ', '_')}.ndjson")
+
+
+class SnapshotIndex:
+    """
+    Índice da última raspagem, guardado em SQLite e identificado pela URL
+    normalizada do perfil: dados da listagem (hash), hash do registro,
+    profundidade da raspagem e o próprio registro.
+
+    Durante a raspagem, médicos cujos dados da listagem não mudaram têm os
+    detalhes reaproveitados do índice (`lookup`). Ao gravar os registros,
+    o índice é atualizado e cada médico é classificado como novo, alterado
+    ou inalterado; ao final da execução, os que não apareceram nas cidades
+    percorridas inteiras (`complete_cities`) são removidos.
+
+    `depth` é a profundidade da execução atual, guardada junto de cada
+    registro gravado. Uma execução mais rasa que a que gravou o registro
+    (ex.: `listing` depois de `qa`) não o substitui: os detalhes e a
+    profundidade guardados são mantidos, para que a próxima execução
+    completa ainda possa reaproveitá-los. O mesmo vale para registros
+    incompletos por falha em alguma busca (`is_degraded`), que nunca são
+    reaproveitados: na próxima execução o perfil é buscado de novo.
+    """
+
+    def __init__(self, path: str = SNAPSHOT_PATH, depth: str = "qa"):
+        self.path = path
+        self.depth = depth
+        # Identifica a execução, para saber quais médicos não apareceram nela
+        self.run_id = uuid.uuid4().hex
+        # Cidades percorridas inteiras nesta execução, cujas remoções são calculadas em `write_removals`
+        self.complete_cities = []
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS doctors (
+                    url TEXT PRIMARY KEY,
+                    city TEXT,
+                    listing_hash TEXT,
+                    content_hash TEXT,
+                    depth TEXT,
+                    record TEXT,
+                    run_id TEXT,
+                    updated_at REAL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS doctors_city ON doctors (city, run_id)")
+
+    def lookup(self, row: dict) -> Optional[tuple]:
+        """
+        Retorna `(detalhes, profundidade)` do médico da última raspagem se os
+        dados dele na listagem não mudaram, ou `None`.
+        """
+        with self._lock:
+            stored = self._conn.execute(
+                "SELECT listing_hash, depth, record FROM doctors WHERE url = ?",
+                (normalize_profile_url(row["link_to_profile"]),),
+            ).fetchone()
+        if stored is None or stored[0] != listing_hash(row) or stored[1] is None:
+            return None
+        record = json.loads(stored[2])
+        if is_degraded(record, stored[1]):
+            return None
+        return record.get("data") or {}, stored[1]
+
+    def update(self, city: str, record: dict) -> Optional[str]:
+        """
+        Guarda o registro no índice, marcando-o como visto nesta execução.
+        Retorna `ADDED`, `CHANGED` ou `None` (inalterado); registros
+        guardados por uma execução mais profunda só são marcados como vistos
+        e contam como inalterados.
+
+        Um registro incompleto (`is_degraded`) não substitui o guardado; se o
+        médico é novo, é guardado sem profundidade, para não ser reaproveitado.
+        """
+        key = normalize_profile_url(record["link_to_profile"])
+        digest = content_hash(record)
+        degraded = is_degraded(record, self.depth)
+        with self._lock, self._conn:
+            stored = self._conn.execute("SELECT content_hash, depth FROM doctors WHERE url = ?", (key,)).fetchone()
+            if stored is not None and (degraded or is_shallower(self.depth, stored[1])):
+                self._conn.execute(
+                    "UPDATE doctors SET city = ?, run_id = ?, updated_at = ? WHERE url = ?",
+                    (city, self.run_id, time.time(), key),
+                )
+                return None
+            self._conn.execute(
+                "INSERT OR REPLACE INTO doctors VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, city, listing_hash(record), digest, None if degraded else self.depth,
+                 json.dumps(record, ensure_ascii=False), self.run_id, time.time()),
+            )
+        if stored is None:
+            return ADDED
+        return CHANGED if stored[0] != digest else None
+
+    def remove_missing(self, city: str) -> Iterator[dict]:
+        """Remove do índice, e retorna, os médicos da cidade que não apareceram nesta execução."""
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT record FROM doctors WHERE city = ? AND run_id != ?", (city, self.run_id)
+            ).fetchall()
+            self._conn.execute("DELETE FROM doctors WHERE city = ? AND run_id != ?", (city, self.run_id))
+        for (record,) in rows:
+            yield json.loads(record)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def write_removals(snapshot: SnapshotIndex) -> None:
+    """
+    Acrescenta ao arquivo de diferenças de cada cidade percorrida inteira
+    nesta execução os médicos que não apareceram, com `change` `removed`.
+
+    Deve ser chamada depois que todas as cidades da execução foram gravadas:
+    um médico que atende em várias cidades aparece no índice com a última
+    cidade em que foi gravado (com o índice de perfis, é raspado em uma só),
+    então só é removido se não apareceu em nenhuma delas.
+    """
+    for city in snapshot.complete_cities:
+        path = delta_output_path(city)
+        with NDJSONSink(path, mode="a") as sink:
+            for record in snapshot.remove_missing(city):
+                sink.write({"change": REMOVED, **record})
+        logger.info(f"{sink.count} médicos removidos de {city}, acrescentados a {path}.")
+    snapshot.complete_cities = []
+
+
+class DeltaSink:
+    """
+    Compara os registros de uma cidade com o `SnapshotIndex` e grava em
+    NDJSON só os médicos novos e alterados, cada um com o campo `change`
+    (`added` ou `changed`). Tem a mesma interface de `NDJSONSink`.
+
+    Os removidos são acrescentados ao mesmo arquivo por `write_removals`, ao
+    final da execução, e só para as cidades em que `finish(complete=True)`
+    indicou que foram percorridas até o fim sem falhas; uma raspagem
+    interrompida ou com páginas e perfis que falharam não marca ninguém
+    como removido.
+    """
+
+    def __init__(self, city: str, snapshot: SnapshotIndex, path: str = None):
+        self.city = city
+        self.snapshot = snapshot
+        self.path = path or delta_output_path(city)
+        self.count = 0
+        self.changes = {ADDED: 0, CHANGED: 0}
+        self._sink = NDJSONSink(self.path)
+
+    def _write_change(self, change: str, record: dict) -> None:
+        self._sink.write({"change": change, **record})
+        self.changes[change] += 1
+
+    def write(self, record: dict) -> None:
+        if record.get("link_to_profile"):
+            change = self.snapshot.update(self.city, record)
+            if change:
+                self._write_change(change, record)
+        self.count += 1
+
+    def write_all(self, records) -> int:
+        start = self.count
+        for record in records:
+            self.write(record)
+        return self.count - start
+
+    def finish(self, complete: bool) -> None:
+        """
+        Encerra a cidade. `complete` indica se ela foi percorrida inteira, sem
+        falhas; só nesse caso os médicos que não apareceram são gravados como
+        removidos (em `write_removals`), já que um médico ausente pode estar
+        só em uma página ou perfil que falhou.
+        """
+        if not complete:
+            logger.warning(f"Raspagem de {self.city} incompleta; remoções não serão calculadas.")
+        elif not self.count:
+            # Uma cidade sem nenhum registro indica falha na raspagem, não que todos os médicos saíram
+            logger.warning(f"Nenhum registro de {self.city} nesta execução; remoções não serão calculadas.")
+        else:
+            self.snapshot.complete_cities.append(self.city)
+        logger.info(
+            f"Diferenças de {self.city}: {self.changes[ADDED]} novos, {self.changes[CHANGED]} alterados e "
+            f"{self.count - self.changes[ADDED] - self.changes[CHANGED]} inalterados, salvos em {self.path}."
+        )
+
+    def close(self) -> None:
+        self._sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,311 @@
+import os
+import abc
+import json
+import time
+import sqlite3
+import threading
+import contextlib
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from utils.setup_logger import logger
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+# Tipos de unidade do modo distribuído, da mais ampla para a mais específica
+CITY_UNIT = "city"
+PAGE_UNIT = "page"
+PROFILE_UNIT = "profile"
+
+# Unidades mais específicas saem primeiro, para que os resultados cheguem cedo e a fila não cresça demais
+PRIORITY = {CITY_UNIT: 0, PAGE_UNIT: 1, PROFILE_UNIT: 2}
+
+MAX_ATTEMPTS = 5
+
+
+@dataclass
+class WorkUnit:
+    kind: str
+    key: str
+    city: str
+    payload: dict = field(default_factory=dict)
+    id: Optional[int] = None
+    attempts: int = 0
+
+
+class WorkQueue(abc.ABC):
+    """
+    Fila de unidades de trabalho compartilhada pelo coordenador e pelos workers.
+
+    Um worker "aluga" uma unidade por um tempo (`lease`); se não concluir nem
+    renovar o aluguel a tempo (ex.: o processo morreu), a unidade volta para a
+    fila. Unidades que falham `max_attempts` vezes ficam como `failed`.
+
+    As unidades são identificadas por `(kind, key)`: inserir de novo uma
+    unidade já existente não tem efeito, o que deduplica perfis encontrados
+    em várias páginas e permite reiniciar o coordenador sobre a mesma fila.
+    Por isso, uma nova raspagem sobre uma fila já usada começa com `reset`.
+    A cidade e o grupo de bairros de cada unidade de perfil enfileirada,
+    inclusive das duplicadas, ficam registrados em `associations`.
+
+    Novos backends (ex.: Redis) implementam estes métodos e são registrados
+    em `QUEUE_BACKENDS`.
+    """
+
+    @abc.abstractmethod
+    def put(self, units: list) -> int:
+        """Enfileira as unidades que ainda não existem. Retorna quantas foram inseridas."""
+
+    @abc.abstractmethod
+    def lease(self, worker: str, seconds: float) -> Optional[WorkUnit]:
+        """Aluga a próxima unidade pendente, ou retorna `None` se não houver."""
+
+    @abc.abstractmethod
+    def extend(self, unit: WorkUnit, worker: str, seconds: float) -> bool:
+        """Renova o aluguel. Retorna `False` se o worker perdeu a unidade."""
+
+    @abc.abstractmethod
+    def complete(self, unit: WorkUnit, worker: str, result=None, children: list = ()) -> bool:
+        """
+        Conclui a unidade guardando o resultado e enfileira as unidades filhas,
+        tudo de uma vez. Retorna `False` (e descarta tudo) se o aluguel expirou
+        e a unidade foi entregue a outro worker.
+        """
+
+    @abc.abstractmethod
+    def fail(self, unit: WorkUnit, worker: str, error: str) -> None:
+        """Devolve a unidade para a fila, ou a marca como falha após `max_attempts` tentativas."""
+
+    @abc.abstractmethod
+    def requeue_expired(self) -> int:
+        """Devolve para a fila as unidades com aluguel vencido. Retorna quantas foram devolvidas."""
+
+    @abc.abstractmethod
+    def counts(self, city: str = None) -> dict:
+        """Conta as unidades por status, de todas as cidades ou só de `city`."""
+
+    @abc.abstractmethod
+    def results(self, city: str) -> Iterator[dict]:
+        """Percorre os resultados das unidades de perfil concluídas da cidade."""
+
+    @abc.abstractmethod
+    def associations(self) -> Iterator[tuple]:
+        """
+        Percorre `(url, cidade, bairro)` dos perfis enfileirados em mais de um
+        lugar (cidade ou grupo de bairros), ordenados por URL.
+        """
+
+    @abc.abstractmethod
+    def reset(self) -> None:
+        """Remove todas as unidades, para começar uma nova raspagem do zero."""
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    Fila em um arquivo SQLite. Serve para vários processos na mesma máquina
+    (ou em um disco compartilhado que suporte os locks do SQLite); cada
+    operação é uma transação, então dois workers nunca alugam a mesma unidade.
+    """
+
+    def __init__(self, path: str = "data/queue.db", max_attempts: int = MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=60, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS units (
+                    id INTEGER PRIMARY KEY,
+                    kind TEXT,
+                    key TEXT,
+                    city TEXT,
+                    payload TEXT,
+                    priority INTEGER,
+                    status TEXT,
+                    attempts INTEGER DEFAULT 0,
+                    worker TEXT,
+                    lease_expires REAL,
+                    result TEXT,
+                    error TEXT,
+                    updated_at REAL,
+                    UNIQUE (kind, key)
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS units_status ON units (status, priority, id)")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS associations (
+                    key TEXT,
+                    city TEXT,
+                    district TEXT,
+                    UNIQUE (key, city, district)
+                )
+            """)
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Transação que bloqueia a escrita desde o início, para a leitura e a atualização serem atômicas."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _insert(self, conn, units) -> int:
+        now = time.time()
+        inserted = 0
+        for unit in units:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO units (kind, key, city, payload, priority, status, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (unit.kind, unit.key, unit.city, json.dumps(unit.payload, ensure_ascii=False),
+                 PRIORITY.get(unit.kind, 0), PENDING, now),
+            )
+            inserted += cursor.rowcount
+            if unit.kind == PROFILE_UNIT:
+                # Registrada mesmo quando o perfil já está na fila, para não perder a cidade/bairro da duplicata
+                conn.execute(
+                    "INSERT OR IGNORE INTO associations VALUES (?, ?, ?)",
+                    (unit.key, unit.city, unit.payload.get("district") or ""),
+                )
+        return inserted
+
+    def put(self, units: list) -> int:
+        with self._lock, self._transaction() as conn:
+            return self._insert(conn, units)
+
+    def _requeue_expired(self, conn) -> int:
+        now = time.time()
+        conn.execute(
+            "UPDATE units SET status = ?, worker = NULL, error = ?, updated_at = ? "
+            "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+            (FAILED, "aluguel expirado", now, LEASED, now, self.max_attempts),
+        )
+        cursor = conn.execute(
+            "UPDATE units SET status = ?, worker = NULL, updated_at = ? WHERE status = ? AND lease_expires < ?",
+            (PENDING, now, LEASED, now),
+        )
+        return cursor.rowcount
+
+    def requeue_expired(self) -> int:
+        with self._lock, self._transaction() as conn:
+            return self._requeue_expired(conn)
+
+    def lease(self, worker: str, seconds: float) -> Optional[WorkUnit]:
+        with self._lock, self._transaction() as conn:
+            requeued = self._requeue_expired(conn)
+            if requeued:
+                logger.warning(f"Fila: {requeued} unidades com aluguel vencido voltaram para a fila.")
+            row = conn.execute(
+                "SELECT id, kind, key, city, payload, attempts FROM units WHERE status = ? "
+                "ORDER BY priority DESC, id LIMIT 1",
+                (PENDING,),
+            ).fetchone()
+            if row is None:
+                return None
+            unit_id, kind, key, city, payload, attempts = row
+            now = time.time()
+            conn.execute(
+                "UPDATE units SET status = ?, worker = ?, lease_expires = ?, attempts = attempts + 1, updated_at = ? "
+                "WHERE id = ?",
+                (LEASED, worker, now + seconds, now, unit_id),
+            )
+        return WorkUnit(kind, key, city, json.loads(payload), id=unit_id, attempts=attempts + 1)
+
+    def extend(self, unit: WorkUnit, worker: str, seconds: float) -> bool:
+        with self._lock, self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE units SET lease_expires = ?, updated_at = ? WHERE id = ? AND status = ? AND worker = ?",
+                (time.time() + seconds, time.time(), unit.id, LEASED, worker),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, unit: WorkUnit, worker: str, result=None, children: list = ()) -> bool:
+        with self._lock, self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE units SET status = ?, result = ?, error = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND status = ? AND worker = ?",
+                (DONE, json.dumps(result, ensure_ascii=False) if result is not None else None,
+                 time.time(), unit.id, LEASED, worker),
+            )
+            if cursor.rowcount == 0:
+                return False
+            self._insert(conn, children)
+            return True
+
+    def fail(self, unit: WorkUnit, worker: str, error: str) -> None:
+        with self._lock, self._transaction() as conn:
+            conn.execute(
+                "UPDATE units SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, worker = NULL, "
+                "lease_expires = NULL, error = ?, updated_at = ? WHERE id = ? AND status = ? AND worker = ?",
+                (self.max_attempts, FAILED, PENDING, error, time.time(), unit.id, LEASED, worker),
+            )
+
+    def counts(self, city: str = None) -> dict:
+        with self._lock:
+            if city is None:
+                rows = self._conn.execute("SELECT status, COUNT(*) FROM units GROUP BY status").fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT status, COUNT(*) FROM units WHERE city = ? GROUP BY status", (city,)
+                ).fetchall()
+        return dict(rows)
+
+    def results(self, city: str, batch_size: int = 500) -> Iterator[dict]:
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, result FROM units WHERE city = ? AND kind = ? AND status = ? AND result IS NOT NULL "
+                    "AND id > ? ORDER BY id LIMIT ?",
+                    (city, PROFILE_UNIT, DONE, last_id, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            for last_id, result in rows:
+                yield json.loads(result)
+
+    def associations(self) -> Iterator[tuple]:
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT key, city, district FROM associations
+                WHERE key IN (SELECT key FROM associations GROUP BY key HAVING COUNT(*) > 1)
+                ORDER BY key, rowid
+            """).fetchall()
+        return iter(rows)
+
+    def reset(self) -> None:
+        with self._lock, self._transaction() as conn:
+            conn.execute("DELETE FROM units")
+            conn.execute("DELETE FROM associations")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+QUEUE_BACKENDS = {
+    "sqlite": SQLiteWorkQueue,
+}
+
+
+def open_queue(spec: str) -> WorkQueue:
+    """
+    Abre a fila a partir de `backend://local`, ex.: `sqlite://data/queue.db`.
+    Sem prefixo, o valor é tratado como o caminho de uma fila SQLite.
+    """
+    backend, _, location = spec.partition("://")
+    if not location:
+        backend, location = "sqlite", spec
+    if backend not in QUEUE_BACKENDS:
+        raise ValueError(f"Backend de fila desconhecido: {backend}. Opções: {', '.join(QUEUE_BACKENDS)}")
+    return QUEUE_BACKENDS[backend](location)
@@ -0,0 +1,18 @@
+import inspect
+
+from src.async_scraper import AsyncDoctorScraper
+from src.scraper import DoctorScraper
+
+
+def test_inherited_methods_do_not_call_coroutines():
+    # Um método síncrono herdado que chama uma corrotina sobrescrita retornaria a corrotina sem executá-la
+    coroutines = {name for name, member in vars(AsyncDoctorScraper).items() if inspect.iscoroutinefunction(member)}
+    inherited = {
+        name: member for name, member in vars(DoctorScraper).items()
+        if inspect.isfunction(member) and name not in vars(AsyncDoctorScraper)
+    }
+    broken = sorted(
+        name for name, member in inherited.items()
+        if any(f"self.{coroutine}(" in inspect.getsource(member) for coroutine in coroutines)
+    )
+    assert broken == []
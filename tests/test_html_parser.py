@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+from utils.html_parser import available_parsers, get_parser
+from utils.parsing import (
+    parse_full_answer,
+    parse_last_page,
+    parse_listing_item,
+    parse_profile,
+    parse_questions,
+    parse_reviews,
+    select_listing_items,
+)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+PROFILE_URL = "https://www.doctoralia.com.br/ana-souza/cardiologista/sao-paulo"
+# Elementos cujo `.text` é comparado entre os backends (sem html/head/body, que só o lxml cria em fragmentos)
+TEXT_SELECTOR = "div, p, span, a, li, ul, nav, time, small, form, textarea, title, script, style, template, noscript"
+
+EXTRACTORS = {
+    "listing.html": lambda soup: {
+        "last_page": parse_last_page(soup),
+        "items": [parse_listing_item(item) for item in select_listing_items(soup)],
+    },
+    "profile.html": lambda soup: parse_profile(soup, PROFILE_URL),
+    "reviews.html": lambda soup: parse_reviews(soup, 'div[class="opinion d-block"]'),
+    "questions.html": parse_questions,
+    "answer.html": parse_full_answer,
+}
+
+pytestmark = pytest.mark.skipif("lxml" not in available_parsers(), reason="lxml não instalado")
+
+
+def read_fixture(name: str, newline: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8", newline="") as f:
+        return f.read().replace("\r\n", "\n").replace("\n", newline)
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"], ids=["lf", "crlf"])
+@pytest.mark.parametrize("name", sorted(EXTRACTORS))
+def test_extractors_match_between_backends(name, newline):
+    html = read_fixture(name, newline)
+    expected = EXTRACTORS[name](get_parser("bs4").parse(html))
+    assert EXTRACTORS[name](get_parser("lxml").parse(html)) == expected
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"], ids=["lf", "crlf"])
+@pytest.mark.parametrize("name", sorted(EXTRACTORS))
+def test_text_matches_between_backends(name, newline):
+    html = read_fixture(name, newline)
+    expected = [node.text for node in get_parser("bs4").parse(html).select(TEXT_SELECTOR)]
+    assert [node.text for node in get_parser("lxml").parse(html).select(TEXT_SELECTOR)] == expected
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"], ids=["lf", "crlf"])
+def test_custom_elements_named_like_raw_text_tags(newline):
+    html = newline.join([
+        "<div><style-x>a</style-x><p",
+        'class="k">Consulta',
+        "Cardiologia</p><style>p {}</style></div>",
+        "<div><title-x>R$ &amp; <b>350</b></title-x><p>Teleconsulta</p></div><title>Perfil</title>",
+    ])
+    expected = [node.text for node in get_parser("bs4").parse(html).select("div, p, b, title")]
+    assert [node.text for node in get_parser("lxml").parse(html).select("div, p, b, title")] == expected
+
+
+def test_implied_end_tags_diverge_between_backends():
+    # Fora do HTML bem formado, os backends montam árvores diferentes: o `html.parser` só fecha `<li>` e `<p>`
+    # na tag de fechamento explícita, enquanto o libxml2 aplica as regras de fechamento implícito do HTML
+    html = read_fixture("implied_end_tags.html", "\n")
+    soup, document = get_parser("bs4").parse(html), get_parser("lxml").parse(html)
+
+    assert [node.text for node in soup.select("li")] == ["AdultosIdosos", "Idosos"]
+    assert [node.text for node in document.select("li")] == ["Adultos", "Idosos"]
+    assert soup.select_one("p").text == "Atendimento humanizadoConvênios aceitos"
+    assert document.select_one("p").text == "Atendimento humanizado"
+
+
+def test_default_parser_is_bs4():
+    assert get_parser().name == "bs4"
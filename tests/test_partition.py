@@ -0,0 +1,127 @@
+from src.partition import MAX_PROBE_ATTEMPTS, DistrictPartitioner
+
+MAX_PAGES = 10
+
+
+def make_districts(*names: str) -> list:
+    return [{"key": name.lower(), "name": name} for name in names]
+
+
+def run(partitioner: DistrictPartitioner, probe) -> DistrictPartitioner:
+    """Consulta os grupos pedidos pelo particionador até o plano ficar pronto."""
+    while True:
+        batches = partitioner.next_probes()
+        if not batches:
+            return partitioner
+        for batch in batches:
+            partitioner.feed(batch, probe(batch))
+
+
+def pages_by_district(pages: dict):
+    """Simula `get_last_page`: o número de páginas de um grupo é a soma das páginas dos seus bairros."""
+    return lambda batch: max(1, sum(pages[district["name"]] for district in batch))
+
+
+def planned(partitioner: DistrictPartitioner) -> list:
+    return sorted((sorted(d["name"] for d in batch), pages) for batch, pages in partitioner.plan())
+
+
+def test_splits_batches_above_limit():
+    pages = {"A": 6, "B": 6, "C": 6, "D": 6}
+    partitioner = run(DistrictPartitioner(make_districts(*pages), MAX_PAGES, total_pages=24), pages_by_district(pages))
+
+    assert planned(partitioner) == [(["A"], 6), (["B"], 6), (["C"], 6), (["D"], 6)]
+    assert partitioner.complete
+    assert partitioner.report()["covered"] == 4
+
+
+def test_merges_small_batches():
+    pages = {"A": 8, "B": 8, "C": 1, "D": 1}
+    partitioner = run(DistrictPartitioner(make_districts(*pages), MAX_PAGES, total_pages=18), pages_by_district(pages))
+
+    assert planned(partitioner) == [(["A", "C", "D"], 10), (["B"], 8)]
+    assert partitioner.report()["listing_pages"] == 18
+
+
+def test_merge_keeps_groups_when_real_pages_exceed_limit():
+    pages = {"A": 7, "B": 1, "C": 1, "D": 1}
+
+    def probe(batch):
+        # A listagem combinada tem mais páginas que a soma das partes
+        return 20 if len(batch) > 1 and any(d["name"] == "A" for d in batch) else pages_by_district(pages)(batch)
+
+    partitioner = run(DistrictPartitioner(make_districts(*pages), MAX_PAGES, total_pages=11), probe)
+
+    assert planned(partitioner) == [(["A"], 7), (["B"], 1), (["C", "D"], 2)]
+
+
+def test_single_district_above_limit_is_truncated():
+    pages = {"A": 15, "B": 2}
+    partitioner = run(DistrictPartitioner(make_districts(*pages), MAX_PAGES, total_pages=17), pages_by_district(pages))
+
+    assert planned(partitioner) == [(["A"], MAX_PAGES), (["B"], 2)]
+    report = partitioner.report()
+    assert report["truncated_districts"] == ["A"]
+    assert report["uncovered_pages"] == 5
+    assert partitioner.complete
+
+
+def test_failed_probe_is_retried():
+    pages = {"A": 6, "B": 6}
+    failures = {"b": 1}
+
+    def probe(batch):
+        key = batch[0]["key"]
+        if len(batch) == 1 and failures.get(key):
+            failures[key] -= 1
+            return None
+        return pages_by_district(pages)(batch)
+
+    partitioner = run(DistrictPartitioner(make_districts(*pages), MAX_PAGES, total_pages=12), probe)
+
+    assert planned(partitioner) == [(["A"], 6), (["B"], 6)]
+    assert partitioner.complete
+
+
+def test_failed_batch_is_split():
+    pages = {"A": 6, "B": 6, "C": 3, "D": 3}
+    attempts = []
+
+    def probe(batch):
+        if [d["name"] for d in batch] == ["C", "D"]:
+            attempts.append(batch)
+            return None
+        return pages_by_district(pages)(batch)
+
+    partitioner = run(DistrictPartitioner(make_districts(*pages), MAX_PAGES, total_pages=18), probe)
+
+    assert len(attempts) == MAX_PROBE_ATTEMPTS
+    assert sorted(d["name"] for batch, _ in partitioner.plan() for d in batch) == ["A", "B", "C", "D"]
+    assert partitioner.complete
+
+
+def test_failed_probe_leaves_district_uncovered():
+    pages = {"A": 6, "B": 6, "C": 6, "D": 6}
+
+    def probe(batch):
+        return None if any(d["name"] == "D" for d in batch) else pages_by_district(pages)(batch)
+
+    partitioner = run(DistrictPartitioner(make_districts(*pages), MAX_PAGES, total_pages=24), probe)
+
+    assert planned(partitioner) == [(["A"], 6), (["B"], 6), (["C"], 6)]
+    assert not partitioner.complete
+    report = partitioner.report()
+    assert report["covered"] == 3
+    assert report["failed_districts"] == ["D"]
+
+
+def test_failed_merge_probe_keeps_groups():
+    pages = {"A": 3, "B": 3, "C": 3}
+
+    def probe(batch):
+        return None if len(batch) == 3 else pages_by_district(pages)(batch)
+
+    partitioner = run(DistrictPartitioner(make_districts(*pages), MAX_PAGES, total_pages=12), probe)
+
+    assert planned(partitioner) == [(["A"], 3), (["B", "C"], 6)]
+    assert partitioner.complete
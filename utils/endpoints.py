@@ -0,0 +1,12 @@
+"""Tipos de endpoint do Doctoralia, usados para configurar cache, limites e métricas por tipo de requisição."""
+
+LISTING = "listing"
+PROFILE = "profile"
+REVIEWS = "reviews"
+QUESTIONS = "questions"
+ANSWER = "answer"
+
+ENDPOINTS = (LISTING, PROFILE, REVIEWS, QUESTIONS, ANSWER)
+
+# Profundidades da raspagem, da mais rasa para a mais completa; cada uma inclui as anteriores
+DEPTHS = ("listing", "profile", "reviews", "qa")
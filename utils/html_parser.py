@@ -0,0 +1,198 @@
+import re
+from functools import lru_cache
+from html.parser import HTMLParser
+from typing import Optional
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+    from cssselect import HTMLTranslator
+except ImportError:
+    lxml = None
+
+
+class SoupParser:
+    """Backend padrão, baseado em BeautifulSoup com `html.parser`."""
+
+    name = "bs4"
+
+    def parse(self, html: str) -> BeautifulSoup:
+        return BeautifulSoup(html, "html.parser")
+
+
+# Elementos cujo texto o BeautifulSoup guarda em strings de outro tipo (código, estilos, modelos e anotações ruby);
+# esse texto só aparece no `.text` do próprio elemento, nunca no dos ancestrais
+STRING_CONTAINERS = {"script", "style", "template", "rt", "rp"}
+# Elementos em que o BeautifulSoup mantém como estão os textos formados só por espaços
+PRESERVE_WHITESPACE = {"pre", "textarea"}
+ASCII_SPACES = " \n\t\f\r"
+# Elementos de texto bruto para os dois parsers (o conteúdo não é decodificado nem montado como elementos)
+RAW_TEXT_TAGS = {"script", "style"}
+# Elementos que o libxml2 pode tratar como texto bruto, mas o `html.parser` (usado pelo bs4) monta como elementos
+RCDATA_TAGS = {"textarea", "title"} - set(getattr(HTMLParser, "RCDATA_CONTENT_ELEMENTS", ()))
+# Blocos de texto bruto, tags com retornos de carro e retornos de carro no texto
+# (o libxml2 converte CRLF em LF; o `html.parser` mantém). O nome da tag termina em espaço, `/` ou `>`,
+# para que elementos como `<style-x>` não sejam confundidos com `<style>`
+_PREPARE = re.compile(
+    r"(<(script|style|textarea|title)(?=[\s/>])[^>]*>)(.*?)(</\2\s*>)|<[^>\r]*\r[^>]*>|\r",
+    re.IGNORECASE | re.DOTALL,
+)
+_ESCAPED_CR = "&#13;"
+
+
+@lru_cache(maxsize=None)
+def _reparsed_tags() -> frozenset:
+    """Elementos de `RCDATA_TAGS` cujo conteúdo o libxml2 instalado deixa como texto (libxml2 >= 2.14)."""
+    document = lxml.html.document_fromstring("<title><b></b></title><textarea><b></b></textarea>")
+    return frozenset(tag for tag in RCDATA_TAGS if not any(len(element) for element in document.iter(tag)))
+
+
+def _prepare_html(html: str) -> str:
+    """
+    Ajusta o HTML para que o libxml2 monte o mesmo texto que o `html.parser`:
+    retornos de carro viram `&#13;` (restaurados depois nos blocos de texto
+    bruto) e, nos elementos que o libxml2 deixa como texto, o conteúdo é
+    escapado para ser montado de novo como elementos em `LxmlParser.parse`.
+    """
+    def replace(match):
+        if match.group() == "\r":
+            return _ESCAPED_CR
+        if not match.group(1):
+            return match.group()
+        tag, content = match.group(2).lower(), match.group(3)
+        if tag in RAW_TEXT_TAGS:
+            content = content.replace("\r", _ESCAPED_CR)
+        elif tag in _reparsed_tags():
+            content = content.replace("&", "&amp;").replace("\r", "&amp;#13;")
+        else:
+            content = _prepare_html(content)
+        return match.group(1) + content + match.group(4)
+
+    return _PREPARE.sub(replace, html)
+
+
+def _soup_string(text: str, preserve: bool) -> str:
+    """Texto como o BeautifulSoup guarda: um trecho só de espaços vira uma quebra de linha ou um espaço."""
+    if preserve or text.strip(ASCII_SPACES):
+        return text
+    return "\n" if "\n" in text else " "
+
+
+def _iter_text(element, target: Optional[str], container: Optional[str], preserve: bool):
+    """
+    Percorre os textos de `element` e dos descendentes, pulando comentários
+    e os que pertencem a outro tipo de string (`container`) que o do nó de
+    partida (`target`).
+    """
+    if not isinstance(element.tag, str):
+        # Comentários e instruções de processamento
+        return
+    if element.tag in STRING_CONTAINERS:
+        container = element.tag
+    preserve = preserve or element.tag in PRESERVE_WHITESPACE
+    if element.text and container == target:
+        yield _soup_string(element.text, preserve)
+    for child in element:
+        yield from _iter_text(child, target, container, preserve)
+        if child.tail and container == target:
+            yield _soup_string(child.tail, preserve)
+
+
+class LxmlNode:
+    """
+    Nó HTML do backend lxml com a mesma interface usada de BeautifulSoup:
+    `select`, `select_one`, `text`, `node["attr"]` e `node.get("attr")`.
+    """
+
+    __slots__ = ("element",)
+
+    def __init__(self, element):
+        self.element = element
+
+    def select(self, css: str) -> list:
+        return [LxmlNode(element) for element in _compile(css)(self.element)]
+
+    def select_one(self, css: str) -> Optional["LxmlNode"]:
+        elements = _compile(css)(self.element)
+        return LxmlNode(elements[0]) if elements else None
+
+    @property
+    def text(self) -> str:
+        """Texto do nó e dos descendentes, igual ao `.text` do BeautifulSoup com `html.parser`."""
+        ancestors = [ancestor.tag for ancestor in self.element.iterancestors()]
+        container = next((tag for tag in ancestors if tag in STRING_CONTAINERS), None)
+        target = self.element.tag if self.element.tag in STRING_CONTAINERS else None
+        preserve = any(tag in PRESERVE_WHITESPACE for tag in ancestors)
+        return "".join(_iter_text(self.element, target, container, preserve))
+
+    @property
+    def attrs(self) -> dict:
+        return dict(self.element.attrib)
+
+    def get(self, name: str, default=None):
+        return self.element.get(name, default)
+
+    def __getitem__(self, name: str) -> str:
+        return self.element.attrib[name]
+
+
+@lru_cache(maxsize=None)
+def _compile(css: str):
+    """Converte o seletor CSS em XPath compilado, mantido em cache por seletor."""
+    # `descendant::` reproduz o comportamento do soupsieve, que não inclui o próprio nó
+    return etree.XPath(HTMLTranslator().css_to_xpath(css, prefix="descendant::"))
+
+
+class LxmlParser:
+    """Backend rápido, baseado em lxml com seletores CSS compilados para XPath."""
+
+    name = "lxml"
+
+    def parse(self, html: str) -> LxmlNode:
+        if not html.strip():
+            html = "<html></html>"
+        document = self._document(_prepare_html(html))
+        for element in document.iter(*RAW_TEXT_TAGS):
+            if element.text:
+                element.text = element.text.replace(_ESCAPED_CR, "\r")
+        for element in document.iter(*_reparsed_tags()) if _reparsed_tags() else ():
+            if element.text:
+                # Monta como elementos o conteúdo que o libxml2 deixou como texto
+                fragment = lxml.html.fragment_fromstring(element.text, create_parent="div")
+                element.text = fragment.text
+                element.extend(list(fragment))
+        return LxmlNode(document)
+
+    @staticmethod
+    def _document(html: str):
+        try:
+            return lxml.html.document_fromstring(html)
+        except ValueError:
+            # lxml recusa strings com declaração de encoding
+            return lxml.html.document_fromstring(html.encode("utf-8"))
+
+
+PARSERS = {
+    SoupParser.name: SoupParser,
+    LxmlParser.name: LxmlParser,
+}
+
+
+def available_parsers() -> list:
+    """Lista os backends de parsing disponíveis no ambiente."""
+    return [name for name in PARSERS if name != LxmlParser.name or lxml is not None]
+
+
+def get_parser(name: Optional[str] = None):
+    """
+    Retorna o backend de parsing pelo nome.
+
+    Sem nome, usa BeautifulSoup; o backend lxml é opcional (`--parser lxml`).
+    """
+    if name is None:
+        name = SoupParser.name
+    if name not in available_parsers():
+        raise ValueError(f"Backend de parsing indisponível: {name}. Opções: {', '.join(available_parsers())}")
+    return PARSERS[name]()
@@ -1,7 +1,152 @@
-from typing import List
+import re
+from typing import List, Optional
 
 def extract_specialties(specializations_text: str) -> List[str]:
     """Extrai especialidades a partir do texto encontrado na tag data-test-id."""
     if not specializations_text:
         return []
-    return [specialty.strip() for specialty in specializations_text.split(",")]
\ No newline at end of file
+    return [specialty.strip() for specialty in specializations_text.split(",")]
+
+
+def parse_last_page(soup) -> Optional[int]:
+    """Extrai o número da última página a partir da paginação, se existir."""
+    last_page_tags = soup.select("a.page-link:not([aria-label='next'])")
+    if last_page_tags:
+        return int(last_page_tags[-1].text.strip())
+    return None
+
+
+def parse_listing_item(item) -> dict:
+    """Extrai os dados de um médico a partir de um item da página de resultados."""
+    link_tag = item.select_one("a")
+    name_tag = item.select_one("span[itemprop='name']")
+    reviews_tag = item.select_one("span.opinion-numeral")
+    span_tags = [span.text.strip() for span in item.select("div.dp-doctor-card + span")]
+    specialties_tag = item.select_one("span[data-test-id='doctor-specializations']")
+
+    return {
+        "professional": name_tag.text.strip() if name_tag else None,
+        "specialties": extract_specialties(specialties_tag.text.strip() if specialties_tag else ""),
+        "register_id": ' '.join(span_tags),
+        "reviews": int(reviews_tag.text.strip().split()[0]) if reviews_tag else 0,
+        "link_to_profile": link_tag["href"] if link_tag else None,
+    }
+
+
+def select_listing_items(soup) -> list:
+    """Retorna os itens de médicos de uma página de resultados."""
+    return soup.select("#search-content > ul > li")
+
+
+def parse_reviews(soup, selector: str = "div.opinion.d-block") -> List[dict]:
+    """Extrai as reviews de um bloco HTML."""
+    reviews = []
+    for review in soup.select(selector):
+        reviewer_name = review.select_one("span[itemprop='name']")
+        review_date = review.select_one("time")
+        review_comment = review.select_one("p[itemprop='reviewBody']")
+        reviews.append({
+            "Reviewer Name": reviewer_name.text.strip() if reviewer_name else None,
+            "Review Date": review_date.text.strip() if review_date else None,
+            "Review Comment": review_comment.text.strip() if review_comment else None,
+        })
+    return reviews
+
+
+def parse_profile(soup, profile_url: str) -> dict:
+    """
+    Extrai os dados da página de perfil do profissional.
+
+    Retorna os campos do perfil, as reviews da primeira página e as chaves
+    auxiliares `doctor_id` e `link_questions`, usadas para buscar o restante
+    das reviews e as perguntas e respostas.
+    """
+    name = soup.select_one("div.unified-doctor-header-info__name span[itemprop='name']")
+    about = soup.select_one("div.about-description")
+    experience_tags = soup.select(".modal-body div.mb-3 ~ div.mb-2")
+    insurance_cover = soup.select_one("div[data-id='check-your-insurance-vue'] p.text-muted")
+    age_public_range = soup.select_one("div[data-test-id='doctor-address-allowed-patients']")
+
+    # Experiência formatada
+    experience = []
+    social_links = []
+    for tag in experience_tags:
+        link_tag = tag.select('a[target="_blank"]')
+        if link_tag:
+            experience.append(''.join([tag.text.split()[0], ' ', tag.text.split()[1]]))
+            for link in link_tag:
+                experience.append(f"{link.text.strip()} ({link['href']})")
+                social_links.append({
+                    "Social Network": link.text.strip(),
+                    "URL": link['href']
+                })
+        else:
+            experience.append(tag.text.strip())
+
+    # Serviços médicos
+    services = []
+    for service in soup.select("div[data-id='services-list-container'] > div"):
+        service_name = service.select_one("p[itemprop='availableService']")
+        price_tag = service.select_one("div.mr-1")
+        price_match = re.search(r"\d+", price_tag.text) if price_tag else None
+        services.append({
+            "Service Name": service_name.text.strip() if service_name else None,
+            "Price": int(price_match.group()) if price_match else None,
+        })
+
+    doctor_id_tag = soup.select_one("div[data-doctor-id]")
+    questions_tag = soup.select_one('a[data-patient-app-event-name="dp-load-more-questions"]')
+
+    return {
+        "Origin URL": profile_url,
+        "Name": name.text.strip() if name else None,
+        "About": about.text.strip() if about else None,
+        "Experience": " ".join(experience),
+        "Social Links": social_links,
+        "Insurance Cover": insurance_cover.text.strip() if insurance_cover else None,
+        "AgePublic Range": age_public_range.text.strip() if age_public_range else None,
+        "Medical Services": services,
+        "Patient Reviews": parse_reviews(soup),
+        "doctor_id": doctor_id_tag["data-doctor-id"] if doctor_id_tag else None,
+        "link_questions": questions_tag["href"] if questions_tag else None,
+    }
+
+
+def parse_questions(soup) -> List[dict]:
+    """
+    Extrai as perguntas e respostas de uma página de perguntas.
+
+    Quando a resposta do bloco está truncada, `Answer Text` fica vazio e
+    `link_answer` aponta para a página com a resposta completa.
+    """
+    questions_and_answers = []
+    for question_block in soup.select('div[data-id="question-box"]'):
+        question = question_block.select_one("p.doctor-question-body").text.strip()
+        category = question_block.select_one("div.text-muted a")
+        answer_date = question_block.select_one("time").text.strip()
+
+        # Pega o texto completo, se tiver, senão pega pelo link
+        answer = None
+        link_answer = None
+        p_tag = question_block.select_one('p.mb-0[itemprop="text"]')
+        if p_tag:
+            a_tag = p_tag.select_one("a[href]")
+            if a_tag:
+                link_answer = a_tag["href"]
+            else:
+                answer = p_tag.text.strip()
+
+        questions_and_answers.append({
+            "Question Title": question,
+            "Question Category": category.text.strip() if category else None,
+            "Full Question": question,
+            "Answer Date": answer_date,
+            "Answer Text": answer,
+            "link_answer": link_answer,
+        })
+    return questions_and_answers
+
+
+def parse_full_answer(soup) -> str:
+    """Extrai a resposta completa do profissional."""
+    return soup.select_one("div.doctor-answer-content").text.strip()
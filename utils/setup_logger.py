@@ -1,4 +1,6 @@
 import logging
+import multiprocessing
+from logging.handlers import QueueHandler, QueueListener
 import colorlog
 def setup_logger(log_file="app.log"):
     """
@@ -16,8 +18,9 @@ def setup_logger(log_file="app.log"):
     # Evita propagação para o root logger
     logger.propagate = False
 
-    # Cria um handler para registrar em arquivo (sem cores)
-    file_handler = logging.FileHandler(log_file)
+    # Cria um handler para registrar em arquivo (sem cores). O arquivo só é
+    # aberto no primeiro log, então workers que trocam os handlers nunca o abrem
+    file_handler = logging.FileHandler(log_file, delay=True)
     file_handler.setLevel(logging.DEBUG)
 
     file_formatter = logging.Formatter(
@@ -51,4 +54,31 @@ def setup_logger(log_file="app.log"):
 
     return logger
 
+
+def start_log_listener():
+    """
+    Centraliza os logs de vários processos.
+
+    Retorna a fila que os workers devem usar e o listener que, no processo
+    principal, repassa os registros para os handlers de console e arquivo.
+    O listener deve ser parado com `listener.stop()` ao final.
+    """
+    queue = multiprocessing.Queue(-1)
+    listener = QueueListener(queue, *logger.handlers, respect_handler_level=True)
+    listener.start()
+    return queue, listener
+
+
+def setup_worker_logger(queue):
+    """
+    Configura o logger de um processo worker para enviar os registros à fila
+    do processo principal, em vez de escrever direto no console e no app.log.
+    """
+    worker_logger = logging.getLogger("logger")
+    worker_logger.setLevel(logging.DEBUG)
+    worker_logger.handlers.clear()
+    worker_logger.propagate = False
+    worker_logger.addHandler(QueueHandler(queue))
+    return worker_logger
+
 logger = setup_logger()
\ No newline at end of file